@@ -1,12 +1,22 @@
 import yaml
 from pathlib import Path
-from typing import Dict, List, Optional
-from pydantic import BaseModel
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel, TypeAdapter
 from pydantic_settings import BaseSettings
 
+# Prefer the libyaml-backed loader when available (much faster parsing)
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 
 class MonitoringConfig(BaseModel):
     exclude_containers: List[str] = []
+    max_concurrent_checks: int = 8  # Registry checks run at once during a batch check
+    max_concurrent_updates: int = 1  # Containers restarted at once during a batch check
+    health_poll_max_interval: int = 15  # Longest wait (seconds) between health status polls after an update
+    watch_image_events: bool = False  # Flag updates as soon as an image tag is pulled on the host
 
 
 class EmailConfig(BaseModel):
@@ -55,6 +65,9 @@ class WebConfig(BaseModel):
 class RegistryConfig(BaseModel):
     username: str = ""
     password: str = ""
+    # Seconds a looked-up manifest digest is reused before asking the registry again
+    digest_cache_ttl: int = 3600  # Floating tags (latest, stable, dev)
+    digest_cache_ttl_pinned: int = 86400  # Version tags
 
 
 class Config(BaseModel):
@@ -66,6 +79,22 @@ class Config(BaseModel):
     registry: RegistryConfig = RegistryConfig()
 
 
+# Built once so the validator for the whole Config tree is only compiled at import
+_config_adapter = TypeAdapter(Config)
+
+# Parsed configs keyed by file path, invalidated when the file's mtime/size changes
+_config_cache: Dict[str, Tuple[Tuple[int, int], Config]] = {}
+
+
+def invalidate_config_cache(config_path: str = "config/config.yaml"):
+    """Forget the parsed config for a file that was just rewritten
+    
+    A same-size rewrite within the filesystem's mtime granularity would
+    otherwise still match the cached signature.
+    """
+    _config_cache.pop(str(Path(config_path)), None)
+
+
 def load_config(config_path: str = "config/config.yaml") -> Config:
     """Load configuration from YAML file"""
     config_file = Path(config_path)
@@ -80,7 +109,17 @@ def load_config(config_path: str = "config/config.yaml") -> Config:
             print(f"Warning: No config file found, using defaults")
             return Config()
     
+    stat = config_file.stat()
+    cache_key = str(config_file)
+    file_signature = (stat.st_mtime_ns, stat.st_size)
+    
+    cached = _config_cache.get(cache_key)
+    if cached and cached[0] == file_signature:
+        return cached[1]
+    
     with open(config_file, 'r') as f:
-        config_data = yaml.safe_load(f)
+        config_data = yaml.load(f, Loader=_YamlLoader)
     
-    return Config(**config_data)
+    config = _config_adapter.validate_python(config_data or {})
+    _config_cache[cache_key] = (file_signature, config)
+    return config
@@ -1,21 +1,194 @@
 import sqlite3
 import json
+import threading
+import time
+import contextvars
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Iterator, Optional
+
+# orjson is an optional speedup for container_config (de)serialization
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Bump on any schema change (tables, columns or indexes), adding a step to
+# Database._migrate when existing tables change; databases already at this
+# version skip schema setup
+SCHEMA_VERSION = 3
+
+# Explicit column lists for the listing queries (order matches the SELECTs)
+UPDATE_HISTORY_COLUMNS = (
+    'id', 'container_name', 'container_id', 'old_image', 'new_image',
+    'old_image_id', 'new_image_id', 'status', 'message', 'timestamp',
+    'health_check_passed', 'rollback_reason',
+)
+
+IMAGE_VERSION_COLUMNS = (
+    'id', 'container_name', 'image_name', 'image_id', 'image_tag',
+    'container_config', 'created_at',
+)
+
+def _dumps_config(container_config: Dict) -> str:
+    """Serialize a container config to compact JSON text"""
+    if orjson is not None:
+        return orjson.dumps(container_config).decode()
+    return json.dumps(container_config, separators=(',', ':'))
+
+
+def _loads_config(data: str) -> Dict:
+    """Deserialize a stored container config"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Local-time ISO-8601 timestamp computed by SQLite (millisecond precision)
+SQL_NOW = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+
+# Hot-path statements, built once so sqlite3's statement cache can reuse them;
+# the timestamp parameter is only bound for writes queued by begin_batch()
+INSERT_UPDATE_HISTORY_SQL = f"""
+    INSERT INTO update_history 
+    (container_name, container_id, old_image, new_image, 
+     old_image_id, new_image_id, status, message, timestamp,
+     health_check_passed, rollback_reason)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, {SQL_NOW}), ?, ?)
+"""
+
+INSERT_IMAGE_VERSION_SQL = f"""
+    INSERT INTO image_versions 
+    (container_name, image_name, image_id, image_tag, 
+     container_config, created_at)
+    VALUES (?, ?, ?, ?, ?, COALESCE(?, {SQL_NOW}))
+"""
+
+SELECT_UPDATE_HISTORY_SQL = f"""
+    SELECT {', '.join(UPDATE_HISTORY_COLUMNS)} FROM update_history 
+    ORDER BY timestamp DESC, id DESC 
+    LIMIT ?
+"""
+
+SELECT_IMAGE_VERSIONS_SQL = f"""
+    SELECT {', '.join(IMAGE_VERSION_COLUMNS)} FROM image_versions 
+    WHERE container_name = ?
+    ORDER BY created_at DESC, id DESC
+"""
+
+SELECT_IMAGE_VERSION_SQL = f"""
+    SELECT {', '.join(IMAGE_VERSION_COLUMNS)} FROM image_versions 
+    WHERE id = ? AND container_name = ?
+"""
 
 
 class Database:
     def __init__(self, db_path: str = "data/updater.db"):
         self.db_path = db_path
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        # One long-lived connection shared by all methods; the lock serializes
+        # access since the web server and monitor may call in from different threads
+        self._lock = threading.RLock()
+        self._conn = self._connect()
+        
+        # Auth lookups run on every web request; users are never deleted, so a
+        # positive has_users answer is permanent and found users can be cached
+        self._has_users = False
+        self._user_cache: Dict[str, Dict] = {}
+        
+        # Writes queued by begin_batch() for the current context (None when not batching)
+        self._batch: contextvars.ContextVar[Optional[List[Callable]]] = contextvars.ContextVar(
+            f"db_batch_{id(self)}", default=None
+        )
+        
         self.init_db()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with tuned PRAGMAs applied"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        
+        # WAL lets readers proceed during writes; NORMAL sync is safe with WAL
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-64000")
+        conn.execute("PRAGMA mmap_size=268435456")
+        
+        return conn
+    
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+    
+    @contextmanager
+    def begin_batch(self):
+        """Queue history/version writes in this context and commit them in one transaction
+        
+        Reads inside the batch do not see the queued writes. Nested batches
+        join the outer one.
+        """
+        if self._batch.get() is not None:
+            yield
+            return
+        
+        pending: List[Callable] = []
+        token = self._batch.set(pending)
+        try:
+            yield
+        finally:
+            self._batch.reset(token)
+            self._commit_writes(pending)
+    
+    def flush_batch(self):
+        """Commit the writes queued so far in the current batch, if any"""
+        pending = self._batch.get()
+        if pending:
+            self._commit_writes(pending)
+    
+    def _commit_writes(self, pending: List[Callable]):
+        """Apply queued writes in a single transaction and empty the queue"""
+        if not pending:
+            return
+        
+        writes = pending[:]
+        del pending[:len(writes)]
+        with self._lock, self._conn as conn:
+            for write in writes:
+                write(conn)
+    
+    def _write(self, write: Callable[[sqlite3.Connection], None]):
+        """Run a write now, or queue it if a batch is open in this context"""
+        pending = self._batch.get()
+        if pending is not None:
+            pending.append(write)
+            return
+        
+        with self._lock, self._conn as conn:
+            write(conn)
+    
+    def _queued_timestamp(self) -> Optional[str]:
+        """Timestamp for a write queued now, matching SQL_NOW's format (None when not batching)"""
+        if self._batch.get() is None:
+            return None
+        return datetime.now().isoformat(timespec='milliseconds')
+    
     def init_db(self):
         """Initialize database schema"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
             
+            # Warm start on an up-to-date database: nothing to create or migrate
+            if cursor.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+                return
+            
+            # Run table creation and migrations as one transaction
+            cursor.execute("BEGIN")
+            
             # Update history table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS update_history (
@@ -34,17 +207,6 @@ class Database:
                 )
             """)
             
-            # Add columns to existing table if they don't exist
-            try:
-                cursor.execute("ALTER TABLE update_history ADD COLUMN health_check_passed INTEGER DEFAULT NULL")
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            
-            try:
-                cursor.execute("ALTER TABLE update_history ADD COLUMN rollback_reason TEXT DEFAULT NULL")
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            
             # Image versions table for rollback
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS image_versions (
@@ -69,13 +231,6 @@ class Database:
                 )
             """)
             
-            # Add setup_completed column to existing table if it doesn't exist
-            # Default to 1 for existing users (they've already configured the app)
-            try:
-                cursor.execute("ALTER TABLE users ADD COLUMN setup_completed INTEGER DEFAULT 1")
-            except sqlite3.OperationalError:
-                pass  # Column already exists
-            
             # Secure settings table for encrypted credentials
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS secure_settings (
@@ -85,7 +240,53 @@ class Database:
                 )
             """)
             
-            conn.commit()
+            # Last known registry manifest digest per image reference
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS remote_digest_cache (
+                    image_name TEXT PRIMARY KEY,
+                    digest TEXT,
+                    etag TEXT,
+                    checked_at REAL NOT NULL
+                )
+            """)
+            
+            self._migrate(cursor)
+            
+            # Indexes for the history listing and per-container version lookups
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_history_ts
+                ON update_history(timestamp DESC)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_versions_container_created
+                ON image_versions(container_name, created_at DESC)
+            """)
+            
+            # Refresh planner statistics so the indexes get picked up
+            cursor.execute("ANALYZE")
+    
+    def _migrate(self, cursor: sqlite3.Cursor):
+        """Bring databases created by older versions up to SCHEMA_VERSION"""
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        
+        if version < 1:
+            # Health check tracking columns on update history
+            self._add_column_if_missing(cursor, "update_history", "health_check_passed", "INTEGER DEFAULT NULL")
+            self._add_column_if_missing(cursor, "update_history", "rollback_reason", "TEXT DEFAULT NULL")
+        
+        if version < 2:
+            # Default to 1 for existing users (they've already configured the app)
+            self._add_column_if_missing(cursor, "users", "setup_completed", "INTEGER DEFAULT 1")
+        
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    def _add_column_if_missing(self, cursor: sqlite3.Cursor, table: str, column: str, definition: str):
+        """Add a column unless the table already has it"""
+        columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
     
     def add_update_history(self, container_name: str, container_id: str, 
                           old_image: str, new_image: str,
@@ -94,133 +295,198 @@ class Database:
                           health_check_passed: Optional[bool] = None,
                           rollback_reason: Optional[str] = None):
         """Record an update attempt"""
-        health_check_int = None if health_check_passed is None else (1 if health_check_passed else 0)
+        self.add_update_history_many([{
+            'container_name': container_name,
+            'container_id': container_id,
+            'old_image': old_image,
+            'new_image': new_image,
+            'old_image_id': old_image_id,
+            'new_image_id': new_image_id,
+            'status': status,
+            'message': message,
+            'health_check_passed': health_check_passed,
+            'rollback_reason': rollback_reason,
+        }])
+    
+    def add_update_history_many(self, entries: List[Dict]):
+        """Record several update attempts in a single transaction
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO update_history 
-                (container_name, container_id, old_image, new_image, 
-                 old_image_id, new_image_id, status, message, timestamp,
-                 health_check_passed, rollback_reason)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (container_name, container_id, old_image, new_image,
-                  old_image_id, new_image_id, status, message, 
-                  datetime.now().isoformat(), health_check_int, rollback_reason))
-            
-            conn.commit()
+        Each entry takes the same keys as add_update_history's arguments.
+        """
+        if not entries:
+            return
+        
+        timestamp = self._queued_timestamp()
+        rows = []
+        for entry in entries:
+            # bool is an int subclass, so sqlite3 stores health_check_passed as 0/1 (or NULL)
+            rows.append((
+                entry['container_name'], entry['container_id'],
+                entry['old_image'], entry['new_image'],
+                entry['old_image_id'], entry['new_image_id'],
+                entry['status'], entry.get('message', ""), timestamp,
+                entry.get('health_check_passed'), entry.get('rollback_reason')
+            ))
+        
+        self._write(lambda conn: conn.executemany(INSERT_UPDATE_HISTORY_SQL, rows))
     
     def add_check_log(self, container_name: str, container_id: str,
                      current_image: str, current_image_id: str,
                      message: str = "No updates available"):
         """Record a check event when no updates are found"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO update_history 
-                (container_name, container_id, old_image, new_image, 
-                 old_image_id, new_image_id, status, message, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (container_name, container_id, current_image, current_image,
-                  current_image_id, current_image_id, "checked", message, 
-                  datetime.now().isoformat()))
-            
-            conn.commit()
+        self.add_check_log_many([{
+            'container_name': container_name,
+            'container_id': container_id,
+            'current_image': current_image,
+            'current_image_id': current_image_id,
+            'message': message,
+        }])
+    
+    def add_check_log_many(self, entries: List[Dict]):
+        """Record several check events in a single transaction
+        
+        Each entry takes the same keys as add_check_log's arguments.
+        """
+        self.add_update_history_many([
+            {
+                'container_name': entry['container_name'],
+                'container_id': entry['container_id'],
+                'old_image': entry['current_image'],
+                'new_image': entry['current_image'],
+                'old_image_id': entry['current_image_id'],
+                'new_image_id': entry['current_image_id'],
+                'status': "checked",
+                'message': entry.get('message', "No updates available"),
+            }
+            for entry in entries
+        ])
     
     def save_image_version(self, container_name: str, image_name: str,
                           image_id: str, image_tag: str, 
                           container_config: Dict):
-        """Save image version for rollback"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO image_versions 
-                (container_name, image_name, image_id, image_tag, 
-                 container_config, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (container_name, image_name, image_id, image_tag,
-                  json.dumps(container_config), datetime.now().isoformat()))
-            
-            conn.commit()
+        """Save image version for rollback, committed immediately even inside a batch"""
+        # The rollback record must be durable before the old container is stopped
+        params = (
+            container_name, image_name, image_id, image_tag,
+            _dumps_config(container_config), None
+        )
+        with self._lock, self._conn as conn:
+            conn.execute(INSERT_IMAGE_VERSION_SQL, params)
     
     def get_update_history(self, limit: int = 50) -> List[Dict]:
         """Get recent update history"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT * FROM update_history 
-                ORDER BY timestamp DESC 
-                LIMIT ?
-            """, (limit,))
+        return list(self.iter_update_history(limit))
+    
+    def iter_update_history(self, limit: int = 50, batch_size: int = 128) -> Iterator[Dict]:
+        """Run the update history query now, returning an iterator that fetches rows in batches
+        
+        The query executes before this returns, so errors surface to the caller
+        rather than partway through a streamed response.
+        """
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.row_factory = None  # Plain tuples, zipped with the known columns
+            cursor.arraysize = batch_size
             
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            try:
+                cursor.execute(SELECT_UPDATE_HISTORY_SQL, (limit,))
+            except Exception:
+                cursor.close()
+                raise
+        
+        def rows() -> Iterator[Dict]:
+            try:
+                while True:
+                    with self._lock:
+                        batch = cursor.fetchmany()
+                    if not batch:
+                        return
+                    for row in batch:
+                        yield dict(zip(UPDATE_HISTORY_COLUMNS, row))
+            finally:
+                with self._lock:
+                    cursor.close()
+        
+        return rows()
     
     def get_image_versions(self, container_name: str) -> List[Dict]:
         """Get available image versions for a container"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
+            cursor.row_factory = None  # Plain tuples, zipped with the known columns
             
-            cursor.execute("""
-                SELECT * FROM image_versions 
-                WHERE container_name = ?
-                ORDER BY created_at DESC
-            """, (container_name,))
+            cursor.execute(SELECT_IMAGE_VERSIONS_SQL, (container_name,))
             
             rows = cursor.fetchall()
             
             result = []
             for row in rows:
-                data = dict(row)
-                data['container_config'] = json.loads(data['container_config'])
+                data = dict(zip(IMAGE_VERSION_COLUMNS, row))
+                data['container_config'] = _loads_config(data['container_config'])
                 result.append(data)
             
             return result
     
+    def get_image_version(self, container_name: str, version_id: int) -> Optional[Dict]:
+        """Get one stored image version of a container by id"""
+        with self._lock, self._conn as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            
+            row = cursor.execute(SELECT_IMAGE_VERSION_SQL, (version_id, container_name)).fetchone()
+            if row is None:
+                return None
+            
+            data = dict(zip(IMAGE_VERSION_COLUMNS, row))
+            data['container_config'] = _loads_config(data['container_config'])
+            return data
+    
     def cleanup_old_versions(self, container_name: str, keep_count: int):
         """Remove old image versions, keeping only the most recent ones"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        def cleanup(conn: sqlite3.Connection):
+            count = conn.execute("""
+                SELECT COUNT(*) FROM image_versions WHERE container_name = ?
+            """, (container_name,)).fetchone()[0]
             
-            cursor.execute("""
+            excess = count - max(keep_count, 0)
+            if excess <= 0:
+                return
+            
+            # Trim only the oldest rows, walking the (container_name, created_at) index
+            conn.execute("""
                 DELETE FROM image_versions 
-                WHERE container_name = ? 
-                AND id NOT IN (
+                WHERE id IN (
                     SELECT id FROM image_versions 
                     WHERE container_name = ?
-                    ORDER BY created_at DESC 
+                    ORDER BY created_at ASC, id ASC 
                     LIMIT ?
                 )
-            """, (container_name, container_name, keep_count))
-            
-            conn.commit()
+            """, (container_name, excess))
+        
+        self._write(cleanup)
     
     def create_user(self, username: str, password_hash: str) -> bool:
         """Create a new user"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._conn as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute("""
+                cursor.execute(f"""
                     INSERT INTO users (username, password_hash, created_at)
-                    VALUES (?, ?, ?)
-                """, (username, password_hash, datetime.now().isoformat()))
-                
-                conn.commit()
+                    VALUES (?, ?, {SQL_NOW})
+                """, (username, password_hash))
+                self._user_cache.pop(username, None)
                 return True
         except sqlite3.IntegrityError:
             return False
     
     def get_user(self, username: str) -> Optional[Dict]:
         """Get user by username"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._lock, self._conn as conn:
+            cached = self._user_cache.get(username)
+            if cached is not None:
+                return dict(cached)
+            
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -232,20 +498,20 @@ class Database:
             row = cursor.fetchone()
             
             if row:
+                self._user_cache[username] = dict(row)
                 return dict(row)
             return None
     
     def mark_setup_completed(self, username: str) -> bool:
         """Mark setup wizard as completed for user"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._conn as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
                     UPDATE users SET setup_completed = 1 WHERE username = ?
                 """, (username,))
-                
-                conn.commit()
+                self._user_cache.pop(username, None)
                 return True
         except Exception:
             return False
@@ -253,43 +519,61 @@ class Database:
     def reset_setup_wizard(self, username: str) -> bool:
         """Reset setup wizard for user"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._conn as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
                     UPDATE users SET setup_completed = 0 WHERE username = ?
                 """, (username,))
-                
-                conn.commit()
+                self._user_cache.pop(username, None)
                 return True
         except Exception:
             return False
     
     def has_users(self) -> bool:
         """Check if any users exist"""
-        with sqlite3.connect(self.db_path) as conn:
+        if self._has_users:
+            return True
+        
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
             
-            cursor.execute("SELECT COUNT(*) FROM users")
-            count = cursor.fetchone()[0]
+            # Stop at the first row instead of counting the whole table
+            cursor.execute("SELECT 1 FROM users LIMIT 1")
+            self._has_users = cursor.fetchone() is not None
+            return self._has_users
+    
+    def get_cached_digest(self, image_name: str) -> Optional[Dict]:
+        """Get the cached registry digest entry for an image reference"""
+        with self._lock, self._conn as conn:
+            row = conn.execute("""
+                SELECT digest, etag, checked_at FROM remote_digest_cache WHERE image_name = ?
+            """, (image_name,)).fetchone()
             
-            return count > 0
+            return dict(row) if row else None
+    
+    def upsert_cached_digest(self, image_name: str, digest: Optional[str],
+                             etag: Optional[str] = None):
+        """Store the registry digest for an image reference (None records a failed lookup)"""
+        with self._lock, self._conn as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO remote_digest_cache (image_name, digest, etag, checked_at)
+                VALUES (?, ?, ?, ?)
+            """, (image_name, digest, etag, time.time()))
     
     def set_secure_setting(self, key: str, value: str):
         """Store a secure setting (like SMTP password)"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
             
-            cursor.execute("""
+            cursor.execute(f"""
                 INSERT OR REPLACE INTO secure_settings (key, value, updated_at)
-                VALUES (?, ?, ?)
-            """, (key, value, datetime.now().isoformat()))
-            
-            conn.commit()
+                VALUES (?, ?, {SQL_NOW})
+            """, (key, value))
     
     def get_secure_setting(self, key: str) -> Optional[str]:
         """Retrieve a secure setting"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -1,54 +1,150 @@
 import docker
 import asyncio
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set
 from datetime import datetime
 from croniter import croniter
 import time
-import shlex
 import os
+import re
 from pathlib import Path
 
 from app.config import Config
 from app.database import Database
 from app.notifications import NotificationService
+from app.registry import RegistryClient
 
 logger = logging.getLogger(__name__)
 
+# Tags that move between releases (cached digests for them expire sooner, and
+# versioned tags are preferred over them when displaying or rolling back)
+FLOATING_TAGS = frozenset({'latest', 'stable', 'dev'})
+
+# Image labels that carry a version, in order of preference
+VERSION_LABELS = (
+    'io.hass.version',  # Home Assistant
+    'org.opencontainers.image.version',  # OCI standard
+    'version',  # Generic
+    'VERSION',  # Generic uppercase
+)
+
+# Network alias docker adds for a container's short id (12 hex characters)
+SHORT_ID_ALIAS = re.compile(r'[0-9a-f]{12}')
+
+# Seconds to wait before retrying a registry digest lookup that failed
+FAILED_DIGEST_TTL = 300
+
+# Minimum seconds between dangling-image prunes (at most one per check cycle)
+PRUNE_INTERVAL = 86400
+
+# Steps for handing a container rolled back as standalone back to compose
+COMPOSE_RESTORE_INSTRUCTIONS = (
+    "To restore compose management:\n"
+    "1. Stop and remove the standalone container:\n"
+    "   docker stop {name}\n"
+    "   docker rm {name}\n\n"
+    "2. Go to your compose directory and start the service:\n"
+    "   cd {compose_dir}\n"
+    "   docker compose up -d {service}"
+)
+
+# Seconds docker compose up may take before it is killed
+COMPOSE_UP_TIMEOUT = 120
+
+# Seconds to wait for in-flight notifications at the end of a check cycle or on shutdown
+NOTIFICATION_FLUSH_TIMEOUT = 30
+
+# Image for the self-update helper; it ships the docker CLI, so nothing is installed at update time
+SELF_UPDATE_HELPER_IMAGE = "docker:cli"
+
+# Script the self-update helper runs
+SELF_UPDATE_SCRIPT = Path(__file__).parent / "helper_scripts" / "self_update.sh"
+
+# When whalekeeper checks its own image for updates (daily at 3 AM)
+SELF_CHECK_SCHEDULE = "0 3 * * *"
+
+# Seconds to collect image events before acting on them (pulls arrive in bursts)
+EVENT_DEBOUNCE = 5
+
+# Seconds to wait before reconnecting to the Docker event stream after it fails
+EVENT_RETRY_DELAY = 60
+
+
+def normalize_image_name(image_name: str) -> str:
+    """Add the implicit :latest tag (a ':' in a registry host:port is not a tag)"""
+    if '@' not in image_name and ':' not in image_name.rsplit('/', 1)[-1]:
+        return f"{image_name}:latest"
+    return image_name
+
+
+def version_from_labels(labels: Optional[Dict[str, str]]) -> Optional[str]:
+    """Get the version an image declares in its labels, if any"""
+    if not labels:
+        return None
+    return next((labels[key] for key in VERSION_LABELS if labels.get(key)), None)
+
 
 class DockerMonitor:
     def __init__(self, config: Config, db: Database, notifier: NotificationService):
-        self.config = config
+        self._config: Optional[Config] = None
+        self.config = config  # Also builds the registry client
         self.db = db
         self.notifier = notifier
         self.client = docker.from_env()
+        self._last_prune: Optional[datetime] = None
+        self._exclude_source: Optional[List[str]] = None
+        self._exclude: frozenset = frozenset()
+        self._event_stream = None  # Open docker events stream while watching image events
+        self._event_task: Optional[asyncio.Task] = None
+        self._cycle_pulls: Optional[Dict[str, Optional[str]]] = None  # image -> pulled digest, per batch check
+        self._repo_digests: Dict[str, Set[str]] = {}  # image ID -> manifest digests it was pulled from
+        self._pending_notifications: Set[asyncio.Task] = set()
+        self._self_update_script = SELF_UPDATE_SCRIPT.read_text()
+        self._check_lock = asyncio.Lock()
         self.running = False
         self.update_cache = {}  # Cache of containers with updates: {container_name: update_info}
     
+    async def _run(self, fn, *args, **kwargs):
+        """Run a blocking docker-py call in a worker thread so the event loop stays responsive"""
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    
+    def _notify(self, **kwargs):
+        """Send a notification in the background so the caller doesn't wait on SMTP/webhooks"""
+        task = asyncio.create_task(self.notifier.send_notification(**kwargs))
+        self._pending_notifications.add(task)
+        task.add_done_callback(self._notification_done)
+    
+    def _notification_done(self, task: asyncio.Task):
+        self._pending_notifications.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Notification failed: {task.exception()}")
+    
+    async def flush_notifications(self, timeout: float = NOTIFICATION_FLUSH_TIMEOUT):
+        """Wait (up to timeout seconds) for background notifications to finish"""
+        if self._pending_notifications:
+            await asyncio.wait(list(self._pending_notifications), timeout=timeout)
+    
     def _get_image_version(self, image) -> str:
         """Extract version from image labels or tags"""
         try:
+            # Image.labels/tags are rebuilt from attrs on every access, so read them once
+            labels = image.labels
+            tags = image.tags
+            
             # Try to get version from image labels (check multiple standard labels)
-            if image.labels:
-                version_label = (
-                    image.labels.get('io.hass.version') or  # Home Assistant
-                    image.labels.get('org.opencontainers.image.version') or  # OCI standard
-                    image.labels.get('version') or  # Generic
-                    image.labels.get('VERSION')  # Generic uppercase
-                )
-                
-                if version_label:
-                    return version_label
+            version_label = version_from_labels(labels)
+            if version_label:
+                return version_label
             
             # Fall back to versioned tags (prefer versioned tags over 'latest', 'stable', 'dev')
-            if image.tags:
-                versioned_tags = [tag.split(':')[-1] for tag in image.tags 
-                                 if not any(x in tag.lower() for x in [':latest', ':stable', ':dev'])]
+            if tags:
+                tag_names = [tag.rsplit(':', 1)[-1] for tag in tags]
+                versioned_tags = [name for name in tag_names if name.lower() not in FLOATING_TAGS]
                 if versioned_tags:
                     return versioned_tags[0]
                 
                 # If only generic tags, use the first one
-                tag = image.tags[0].split(':')[-1]
+                tag = tag_names[0]
                 if tag:
                     return tag
             
@@ -61,8 +157,9 @@ class DockerMonitor:
         """Get display name for image (base name with version instead of generic tag)"""
         try:
             # Get the base image name (without tag)
-            if image.tags:
-                base_name = image.tags[0].rsplit(':', 1)[0]
+            tags = image.tags
+            if tags:
+                base_name = tags[0].rsplit(':', 1)[0]
             else:
                 # No tags, return image ID
                 return image.id[:12]
@@ -75,31 +172,100 @@ class DockerMonitor:
         except Exception:
             return image.id[:12]
     
+    @property
+    def config(self) -> Config:
+        """Current config; the settings routes replace it at runtime"""
+        return self._config
+    
+    @config.setter
+    def config(self, config: Config):
+        # Registry tokens and the docker login belong to the old credentials
+        previous, self._config = self._config, config
+        if previous is not None and self._registry_settings(previous) == self._registry_settings(config):
+            return
+        
+        self.registry = RegistryClient(
+            username=config.registry.username,
+            password=config.registry.password,
+            pool_size=config.monitoring.max_concurrent_checks
+        )
+        self._registry_authenticated = False
+    
+    @staticmethod
+    def _registry_settings(config: Config) -> tuple:
+        """Settings the registry client and docker login were built from"""
+        return (config.registry.username, config.registry.password, config.monitoring.max_concurrent_checks)
+    
+    @property
+    def excluded_containers(self) -> frozenset:
+        """Names of containers excluded from monitoring, as a set for O(1) lookups"""
+        # Rebuilt whenever the config (and so the exclude list) is replaced at runtime
+        excludes = self.config.monitoring.exclude_containers
+        if excludes is not self._exclude_source:
+            self._exclude = frozenset(excludes)
+            self._exclude_source = excludes
+        return self._exclude
+    
     def has_update(self, container_name: str) -> bool:
         """Check if a container has an update available (from cache)"""
         return container_name in self.update_cache
     
     def get_monitored_containers(self) -> List[docker.models.containers.Container]:
         """Get list of containers to monitor based on configuration"""
-        all_containers = self.client.containers.list()
-        
-        # Filter out excluded containers (if no excludes, monitor all)
-        containers = [
-            c for c in all_containers 
-            if c.name not in self.config.monitoring.exclude_containers
-        ]
+        # Filter the running containers by name from the list summaries (the daemon has
+        # no name-exclude filter), so excluded containers are never inspected
+        containers = []
+        for name in self.get_monitored_container_names():
+            try:
+                containers.append(self.client.containers.get(name))
+            except docker.errors.NotFound:
+                # Removed between the list and inspect calls
+                continue
         
         return containers
     
+    def get_container_summaries(self) -> List[Dict]:
+        """List running containers as plain summary dicts
+        
+        Uses the low-level API: a single request, unlike containers.list() which
+        inspects every container. Each summary gets a 'name' key added.
+        """
+        summaries = self.client.api.containers()
+        for summary in summaries:
+            names = summary.get('Names') or ['']
+            summary['name'] = names[0].lstrip('/')
+        return summaries
+    
+    def get_image_summaries(self) -> Dict[str, Dict]:
+        """Map image ID -> low-level image summary (RepoTags, Labels) in a single request"""
+        return {image['Id']: image for image in self.client.api.images()}
+    
+    def get_monitored_container_names(self) -> List[str]:
+        """Names of the containers get_monitored_containers would return, without inspecting them"""
+        excluded = self.excluded_containers
+        return [
+            summary['name'] for summary in self.get_container_summaries()
+            if summary['name'] not in excluded
+        ]
+    
     def check_for_updates(self, container) -> Optional[Dict]:
         """Check if a newer image is available for a container"""
         try:
-            # Get current image
-            current_image = container.image
+            # The container inspect already names its image ID; the image itself is only
+            # inspected when its digests aren't cached, its tags are needed or it's updated
+            current_image = None
+            image_id = container.attrs.get('Image')
+            local_digests = self._repo_digests.get(image_id) if image_id else None
+            if local_digests is None:
+                current_image = container.image
+                image_id = current_image.id
+                local_digests = self._cache_repo_digests(current_image)
+            
             image_name = container.attrs['Config']['Image']
             
             # If image_name is a sha256 digest or empty, get the actual repo name from image tags
             if not image_name or image_name.startswith('sha256:') or image_name.strip() == '':
+                current_image = current_image or container.image
                 if current_image.tags:
                     image_name = current_image.tags[0]
                 else:
@@ -112,48 +278,163 @@ class DockerMonitor:
                 return None
             
             # Handle image name without tag
-            if ':' not in image_name:
-                image_name += ':latest'
+            image_name = normalize_image_name(image_name)
             
-            # Pull latest image
             logger.info(f"Checking for updates: {image_name}")
             
-            # Login to registry if configured
-            if self.config.registry.username and self.config.registry.password:
-                self.client.login(
-                    username=self.config.registry.username,
-                    password=self.config.registry.password
-                )
-            
-            latest_image = self.client.images.pull(image_name)
+            # Cheap path: ask the registry for the tag's manifest digest and skip
+            # the pull entirely if it matches a digest the local image was pulled from
+            latest_image = None
+            if local_digests:
+                remote_digest = self._get_remote_digest(image_name)
+                if remote_digest and remote_digest in local_digests:
+                    logger.info(f"No update for {container.name} (registry digest unchanged)")
+                    return None
+                
+                # The new image may already be on this host (pulled by hand, by another
+                # tag, or for another container), in which case there's nothing to download
+                if remote_digest:
+                    latest_image = self._get_local_image_by_digest(image_name, remote_digest)
+            
+            if latest_image is None:
+                # Digest unknown or changed - pull and compare image IDs
+                self._ensure_registry_login()
+                
+                try:
+                    pulled_digest = self._pull(image_name)
+                except docker.errors.APIError as e:
+                    # Credentials may have been rotated - log in again on the next check
+                    if e.status_code in (401, 403):
+                        self._registry_authenticated = False
+                    raise
+                
+                # The pull reports the tag's manifest digest; if the local image was pulled
+                # from it, nothing changed and the new image needn't be inspected
+                if pulled_digest and pulled_digest in local_digests:
+                    logger.info(f"No update for {container.name}")
+                    return None
+                
+                latest_image = self.client.images.get(image_name)
             
             # Compare image IDs
-            if current_image.id != latest_image.id:
-                logger.info(f"Update available for {container.name}: {current_image.id[:12]} -> {latest_image.id[:12]}")
+            if image_id != latest_image.id:
+                logger.info(f"Update available for {container.name}: {image_id[:12]} -> {latest_image.id[:12]}")
                 return {
                     'container': container,
-                    'old_image': current_image,
+                    'old_image': current_image or container.image,
                     'new_image': latest_image,
                     'image_name': image_name
                 }
             else:
                 logger.info(f"No update for {container.name}")
-                # No update available - images are identical
-                # Note: Docker doesn't create duplicates when pulling same image,
-                # but we'll prune dangling images to keep things clean
-                try:
-                    self.client.images.prune(filters={'dangling': True})
-                except Exception as e:
-                    logger.debug(f"Image prune skipped: {e}")
+                # No update available - images are identical; a pull may have added digests
+                self._cache_repo_digests(latest_image)
                 return None
                 
         except Exception as e:
             logger.error(f"Error checking updates for {container.name}: {e}")
             return None
     
+    def _cache_repo_digests(self, image) -> Set[str]:
+        """Remember the manifest digests an inspected image was pulled from"""
+        digests = {
+            repo_digest.split('@', 1)[1]
+            for repo_digest in image.attrs.get('RepoDigests') or []
+            if '@' in repo_digest
+        }
+        self._repo_digests[image.id] = digests
+        return digests
+    
+    def _get_local_image_by_digest(self, image_name: str, digest: str):
+        """Find a local image of this repository pulled from the given manifest digest
+        
+        The image is tagged as image_name (as a pull would) before it is returned.
+        """
+        repository, tag = docker.utils.parse_repository_tag(image_name)
+        suffix = f"@{digest}"
+        for summary in self.client.api.images(name=repository):
+            if any(repo_digest.endswith(suffix) for repo_digest in summary.get('RepoDigests') or []):
+                if image_name not in (summary.get('RepoTags') or []):
+                    self.client.api.tag(summary['Id'], repository, tag)
+                return self.client.images.get(summary['Id'])
+        return None
+    
+    def _pull(self, image_name: str) -> Optional[str]:
+        """Pull an image through the streaming API, returning the manifest digest it reports
+        
+        During a batch check each image is pulled at most once.
+        """
+        cycle_pulls = self._cycle_pulls
+        if cycle_pulls is not None and image_name in cycle_pulls:
+            return cycle_pulls[image_name]
+        
+        repository, tag = docker.utils.parse_repository_tag(image_name)
+        digest = None
+        
+        for line in self.client.api.pull(repository, tag=tag, stream=True, decode=True):
+            if 'error' in line:
+                raise docker.errors.APIError(line['error'])
+            status = line.get('status', '')
+            if status.startswith('Digest: '):
+                digest = status[len('Digest: '):]
+        
+        if cycle_pulls is not None:
+            cycle_pulls[image_name] = digest
+        return digest
+    
+    @staticmethod
+    def _image_group_key(container) -> str:
+        """Key grouping containers that run the same configured image"""
+        image_name = container.attrs.get('Config', {}).get('Image')
+        if not isinstance(image_name, str) or not image_name.strip() or image_name.startswith('sha256:'):
+            # Resolved from image tags inside check_for_updates; don't group
+            return f"container:{container.id}"
+        return normalize_image_name(image_name)
+    
+    def _ensure_registry_login(self):
+        """Login to registry if configured, once until the login is rejected"""
+        if self._registry_authenticated:
+            return
+        if self.config.registry.username and self.config.registry.password:
+            self.client.login(
+                username=self.config.registry.username,
+                password=self.config.registry.password
+            )
+            self._registry_authenticated = True
+    
+    def _get_remote_digest(self, image_name: str) -> Optional[str]:
+        """Get the registry digest for an image, reusing the cached one while it is fresh"""
+        cached = self.db.get_cached_digest(image_name)
+        
+        if cached:
+            if cached['digest'] is None:
+                ttl = FAILED_DIGEST_TTL
+            elif image_name.rsplit(':', 1)[-1].lower() in FLOATING_TAGS:
+                ttl = self.config.registry.digest_cache_ttl
+            else:
+                ttl = self.config.registry.digest_cache_ttl_pinned
+            
+            if time.time() - cached['checked_at'] < ttl:
+                return cached['digest']
+        
+        # Revalidate with the stored ETag so an unchanged manifest answers 304
+        etag = cached['etag'] if cached and cached['digest'] else None
+        manifest = self.registry.head_manifest(image_name, etag=etag)
+        
+        if manifest is None:
+            self.db.upsert_cached_digest(image_name, None)
+            return None
+        
+        digest = cached['digest'] if manifest['not_modified'] else manifest['digest']
+        self.db.upsert_cached_digest(image_name, digest, manifest['etag'])
+        return digest
+    
     def get_container_config(self, container) -> Dict:
         """Extract container configuration for recreation"""
-        attrs = container.attrs
+        return self.get_container_config_from_attrs(container.attrs)
+    
+    def get_container_config_from_attrs(self, attrs: Dict) -> Dict:
+        """Extract container configuration from already-fetched inspect data"""
         config = attrs['Config']
         host_config = attrs['HostConfig']
         network_settings = attrs.get('NetworkSettings', {})
@@ -179,8 +460,8 @@ class DockerMonitor:
             }
         
         return {
-            'image': attrs['Config']['Image'],
-            'name': container.name,
+            'image': config['Image'],
+            'name': attrs['Name'].lstrip('/'),
             'environment': config.get('Env', []),
             'volumes': host_config.get('Binds', []),
             'ports': host_config.get('PortBindings', {}),
@@ -200,6 +481,30 @@ class DockerMonitor:
             'devices': host_config.get('Devices'),
         }
     
+    def _run_kwargs(self, container_config: Dict, image_id: str) -> Dict:
+        """Build containers.run() arguments to recreate a container from its saved config"""
+        return {
+            'image': image_id,
+            'name': container_config['name'],
+            'environment': container_config.get('environment'),
+            'volumes': container_config.get('volumes', []),  # Binds passed directly as list
+            'ports': container_config.get('ports'),
+            'network_mode': container_config.get('network_mode'),
+            'restart_policy': container_config.get('restart_policy'),
+            'labels': container_config.get('labels'),
+            'command': container_config.get('command'),
+            'entrypoint': container_config.get('entrypoint'),
+            'working_dir': container_config.get('working_dir'),
+            'user': container_config.get('user'),
+            'hostname': container_config.get('hostname'),
+            'extra_hosts': container_config.get('extra_hosts'),
+            'privileged': container_config.get('privileged'),
+            'cap_add': container_config.get('cap_add'),
+            'cap_drop': container_config.get('cap_drop'),
+            'devices': container_config.get('devices'),
+            'detach': True,
+        }
+    
     def reconnect_networks(self, container, container_config: Dict):
         """Reconnect container to all networks with proper aliases (critical for compose)"""
         networks = container_config.get('networks', {})
@@ -210,6 +515,7 @@ class DockerMonitor:
         
         # Get the network the container was created on (from network_mode)
         primary_network = container_config.get('network_mode', 'bridge')
+        container_name = container.name
         
         try:
             # Connect to additional networks with aliases
@@ -218,27 +524,22 @@ class DockerMonitor:
                 if network_name == primary_network:
                     continue
                 
-                aliases = network_config.get('aliases', [])
+                aliases = network_config.get('aliases') or []
                 links = network_config.get('links')
                 
-                # Filter out auto-generated aliases (container ID which is 12-char hex)
-                # Keep service names and other meaningful aliases
-                meaningful_aliases = []
-                for alias in aliases:
-                    # Skip if it's the container name itself
-                    if alias == container.name:
-                        continue
-                    # Skip if it looks like a container ID (12 hex chars)
-                    if len(alias) == 12 and all(c in '0123456789abcdef' for c in alias):
-                        continue
-                    meaningful_aliases.append(alias)
+                # Filter out the container name and auto-generated aliases (container ID
+                # which is 12-char hex); keep service names and other meaningful aliases
+                meaningful_aliases = [
+                    alias for alias in aliases
+                    if alias != container_name and not SHORT_ID_ALIAS.fullmatch(alias)
+                ]
                 
                 try:
-                    network = self.client.networks.get(network_name)
-                    
-                    # Prepare connection parameters
+                    # Prepare connection parameters (the daemon resolves the network by
+                    # name, so it doesn't need fetching first)
                     connect_params = {
-                        'container': container,
+                        'container': container.id,
+                        'net_id': network_name,
                         'aliases': meaningful_aliases if meaningful_aliases else None,
                         'links': links
                     }
@@ -252,7 +553,7 @@ class DockerMonitor:
                     if ipv6_address:
                         connect_params['ipv6_address'] = ipv6_address
                     
-                    network.connect(**connect_params)
+                    self.client.api.connect_container_to_network(**connect_params)
                     
                     ip_info = f" with IP {ipv4_address}" if ipv4_address else ""
                     logger.info(f"Reconnected {container.name} to network {network_name} with aliases: {meaningful_aliases}{ip_info}")
@@ -331,6 +632,8 @@ class DockerMonitor:
                 status="success",
                 message="Self-update initiated - container will restart shortly"
             )
+            # Commit now even inside a batch check; this process is about to be replaced
+            self.db.flush_batch()
             
             # Get current container config
             config = self.get_container_config(container)
@@ -341,29 +644,14 @@ class DockerMonitor:
             # Build docker run command for recreating whalekeeper
             run_cmd = self._build_docker_run_command(config, new_image_ref)
             
-            # Escape command for safe shell execution
-            escaped_run_cmd = shlex.quote(run_cmd)
-            
-            # Create helper script that will update whalekeeper
-            helper_script = f'''#!/bin/sh
-echo "Helper: Installing docker CLI..."
-apk add --no-cache docker-cli > /dev/null 2>&1
-echo "Helper: Waiting 10 seconds before updating whalekeeper..."
-sleep 10
-echo "Helper: Stopping whalekeeper container..."
-docker stop whalekeeper || true
-echo "Helper: Removing whalekeeper container..."
-docker rm whalekeeper || true
-echo "Helper: Starting new whalekeeper container..."
-eval {escaped_run_cmd}
-echo "Helper: Whalekeeper updated successfully"
-'''
-            
-            # Run helper container with Docker socket access
+            # Run helper container with Docker socket access (the run command is
+            # passed in the environment, so it needs no extra shell quoting)
             logger.info("Spawning helper container for self-update...")
-            self.client.containers.run(
-                image='alpine:latest',
-                command=['sh', '-c', helper_script],
+            await self._run(
+                self.client.containers.run,
+                image=SELF_UPDATE_HELPER_IMAGE,
+                command=['sh', '-c', self._self_update_script],
+                environment={'WHALEKEEPER_RUN_CMD': run_cmd},
                 volumes={'/var/run/docker.sock': {'bind': '/var/run/docker.sock', 'mode': 'rw'}},
                 remove=True,
                 detach=True,
@@ -377,6 +665,51 @@ echo "Helper: Whalekeeper updated successfully"
             logger.error(f"Failed to schedule self-update: {e}")
             return False
     
+    @staticmethod
+    def _validate_compose_path(raw_path: str, must_exist: bool = False) -> Optional[str]:
+        """Normalize a compose path from container labels
+        
+        Returns None unless the path is absolute and free of '..' components (and,
+        with must_exist, present). Purely lexical, so it needs no per-component stats.
+        """
+        if '\x00' in raw_path or os.pardir in raw_path.split(os.sep):
+            return None
+        
+        path = os.path.normpath(raw_path)
+        if not os.path.isabs(path) or (must_exist and not os.path.exists(path)):
+            return None
+        return path
+    
+    async def _compose_up(self, compose_file_path: str, compose_project: str, compose_service: str):
+        """Run docker compose up -d for one service without blocking the event loop"""
+        compose_cmd_parts = ['docker', 'compose', '-f', compose_file_path, '-p', compose_project, 'up', '-d', compose_service]
+        
+        process = await asyncio.create_subprocess_exec(
+            *compose_cmd_parts,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), timeout=COMPOSE_UP_TIMEOUT)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise Exception(f"docker-compose command timed out after {COMPOSE_UP_TIMEOUT}s")
+        
+        if process.returncode != 0:
+            raise Exception(f"docker-compose command failed: {stderr.decode(errors='replace')}")
+    
+    async def _get_recreated_container(self, container_name: str, timeout: float = 10):
+        """Fetch a just-recreated container, retrying briefly if it isn't visible yet"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return await self._run(self.client.containers.get, container_name)
+            except docker.errors.NotFound:
+                if time.monotonic() >= deadline:
+                    raise
+                await asyncio.sleep(0.5)
+    
     async def monitor_container_health(self, container_name: str, old_image_id: str) -> tuple[bool, str]:
         """
         Monitor container health after update.
@@ -385,8 +718,8 @@ echo "Helper: Whalekeeper updated successfully"
         Uses Docker HEALTHCHECK if available, otherwise monitors for crashes for 2 minutes.
         """
         try:
-            container = self.client.containers.get(container_name)
-            container.reload()
+            # get() inspects the container, so its attrs are current; each poll reloads them once
+            container = await self._run(self.client.containers.get, container_name)
             
             # Check if container has a HEALTHCHECK defined
             has_healthcheck = False
@@ -397,12 +730,12 @@ echo "Helper: Whalekeeper updated successfully"
                 # Container has HEALTHCHECK - wait for it to become healthy
                 logger.info(f"Monitoring {container_name} using Docker HEALTHCHECK (max 10 minutes)")
                 max_wait_time = 600  # 10 minutes max
-                check_interval = 5
+                # Poll quickly at first, then back off while the health check is still starting
+                check_interval = 1
+                max_interval = max(self.config.monitoring.health_poll_max_interval, 1)
                 elapsed = 0
                 
-                while elapsed < max_wait_time:
-                    container.reload()
-                    
+                while True:
                     # Check if container crashed
                     if container.status != 'running':
                         return False, f"Container stopped/crashed (status: {container.status})"
@@ -416,9 +749,15 @@ echo "Helper: Whalekeeper updated successfully"
                     elif health_status == 'unhealthy':
                         return False, "Docker health check failed (status: unhealthy)"
                     
+                    if elapsed >= max_wait_time:
+                        break
+                    
                     # Still starting or checking, wait more
-                    await asyncio.sleep(check_interval)
-                    elapsed += check_interval
+                    wait = min(check_interval, max_wait_time - elapsed)
+                    await asyncio.sleep(wait)
+                    elapsed += wait
+                    check_interval = min(check_interval * 2, max_interval)
+                    await self._run(container.reload)
                 
                 # Timeout - health check never became healthy
                 return False, f"Health check timeout after {max_wait_time}s (still in '{health_status}' state)"
@@ -431,9 +770,7 @@ echo "Helper: Whalekeeper updated successfully"
                 elapsed = 0
                 initial_restart_count = container.attrs.get('RestartCount', 0)
                 
-                while elapsed < monitoring_duration:
-                    container.reload()
-                    
+                while True:
                     # Check if container stopped
                     if container.status != 'running':
                         return False, f"Container stopped (status: {container.status}, exit code: {container.attrs['State'].get('ExitCode', 'unknown')})"
@@ -443,8 +780,12 @@ echo "Helper: Whalekeeper updated successfully"
                     if current_restart_count > initial_restart_count + 1:
                         return False, f"Container restarted {current_restart_count - initial_restart_count} times"
                     
+                    if elapsed >= monitoring_duration:
+                        break
+                    
                     await asyncio.sleep(check_interval)
                     elapsed += check_interval
+                    await self._run(container.reload)
                 
                 # Made it through monitoring period without issues
                 logger.info(f"{container_name} stable after {monitoring_duration}s")
@@ -466,44 +807,22 @@ echo "Helper: Whalekeeper updated successfully"
             
             # Get current (failed) container
             try:
-                failed_container = self.client.containers.get(container_name)
-                failed_container.stop(timeout=10)
-                failed_container.remove()
+                failed_container = await self._run(self.client.containers.get, container_name)
+                await self._run(failed_container.stop, timeout=10)
+                await self._run(failed_container.remove)
             except docker.errors.NotFound:
                 pass
             
             # Get old image
-            old_image = self.client.images.get(old_image_id)
+            old_image = await self._run(self.client.images.get, old_image_id)
             
             # Recreate container with old image
             logger.info(f"Recreating {container_name} with previous image {old_image_id[:12]}")
             
-            binds = container_config.get('volumes', [])
-            
-            new_container = self.client.containers.run(
-                image=old_image.id,
-                name=container_config['name'],
-                environment=container_config.get('environment'),
-                volumes=binds,
-                ports=container_config.get('ports'),
-                network_mode=container_config.get('network_mode'),
-                restart_policy=container_config.get('restart_policy'),
-                labels=container_config.get('labels'),
-                command=container_config.get('command'),
-                entrypoint=container_config.get('entrypoint'),
-                working_dir=container_config.get('working_dir'),
-                user=container_config.get('user'),
-                hostname=container_config.get('hostname'),
-                extra_hosts=container_config.get('extra_hosts'),
-                privileged=container_config.get('privileged'),
-                cap_add=container_config.get('cap_add'),
-                cap_drop=container_config.get('cap_drop'),
-                devices=container_config.get('devices'),
-                detach=True
-            )
+            new_container = await self._run(self.client.containers.run, **self._run_kwargs(container_config, old_image.id))
             
             # Reconnect to all networks with aliases
-            self.reconnect_networks(new_container, container_config)
+            await self._run(self.reconnect_networks, new_container, container_config)
             
             logger.info(f"Successfully rolled back {container_name} to {old_image_id[:12]}")
             return True
@@ -525,58 +844,35 @@ echo "Helper: Whalekeeper updated successfully"
         if is_self_update:
             return await self.self_update(update_info)
         
+        # Extract versions from image labels or tags once (prefer version number over generic tags)
+        old_version = self._get_image_version(old_image)
+        new_version = self._get_image_version(new_image)
+        
         try:
-            
             # Save current configuration for rollback
             container_config = self.get_container_config(container)
             
-            # Extract version from image labels or tags (prefer version number over generic tags)
-            image_tag = self._get_image_version(old_image)
-            
             self.db.save_image_version(
                 container_name=container.name,
                 image_name=image_name,
                 image_id=old_image.id,
-                image_tag=image_tag,
+                image_tag=old_version,
                 container_config=container_config
             )
             
             # Stop and remove old container
             logger.info(f"Stopping container {container.name}")
-            container.stop(timeout=30)
-            container.remove()
+            await self._run(container.stop, timeout=30)
+            await self._run(container.remove)
             
             # Create new container with same config but new image
             logger.info(f"Creating new container {container.name} with image {new_image.id[:12]}")
             
-            # Use binds directly from the original container configuration
-            binds = container_config.get('volumes', [])
-            
             # Create new container
-            new_container = self.client.containers.run(
-                image=new_image.id,
-                name=container_config['name'],
-                environment=container_config.get('environment'),
-                volumes=binds,  # Pass binds directly as list
-                ports=container_config.get('ports'),
-                network_mode=container_config.get('network_mode'),
-                restart_policy=container_config.get('restart_policy'),
-                labels=container_config.get('labels'),
-                command=container_config.get('command'),
-                entrypoint=container_config.get('entrypoint'),
-                working_dir=container_config.get('working_dir'),
-                user=container_config.get('user'),
-                hostname=container_config.get('hostname'),
-                extra_hosts=container_config.get('extra_hosts'),
-                privileged=container_config.get('privileged'),
-                cap_add=container_config.get('cap_add'),
-                cap_drop=container_config.get('cap_drop'),
-                devices=container_config.get('devices'),
-                detach=True
-            )
+            new_container = await self._run(self.client.containers.run, **self._run_kwargs(container_config, new_image.id))
             
             # Reconnect to all networks with aliases (critical for compose containers)
-            self.reconnect_networks(new_container, container_config)
+            await self._run(self.reconnect_networks, new_container, container_config)
             
             # Monitor container health after update
             logger.info(f"Monitoring {container.name} health after update...")
@@ -593,8 +889,8 @@ echo "Helper: Whalekeeper updated successfully"
                 self.db.add_update_history(
                     container_name=container.name,
                     container_id=new_container.id,
-                    old_image=self._get_image_version(old_image),
-                    new_image=self._get_image_version(new_image),
+                    old_image=old_version,
+                    new_image=new_version,
                     old_image_id=old_image.id,
                     new_image_id=new_image.id,
                     status="rolled_back",
@@ -613,13 +909,13 @@ echo "Helper: Whalekeeper updated successfully"
                 
                 # Send rollback notification
                 if send_notification:
-                    await self.notifier.send_notification(
+                    self._notify(
                         title=f"⚠️ Auto-Rollback: {container.name}",
                         message=f"Update failed health check and was automatically rolled back",
                         update_info={
                             "Container": container.name,
-                            "Old Image": self._get_image_version(old_image),
-                            "New Image (Failed)": self._get_image_version(new_image),
+                            "Old Image": old_version,
+                            "New Image (Failed)": new_version,
                             "Failure Reason": failure_reason,
                             "Rollback": "Success" if rollback_success else "Failed",
                             "Current State": "Running on previous version" if rollback_success else "Manual intervention required"
@@ -636,8 +932,8 @@ echo "Helper: Whalekeeper updated successfully"
             self.db.add_update_history(
                 container_name=container.name,
                 container_id=new_container.id,
-                old_image=self._get_image_version(old_image),
-                new_image=self._get_image_version(new_image),
+                old_image=old_version,
+                new_image=new_version,
                 old_image_id=old_image.id,
                 new_image_id=new_image.id,
                 status="success",
@@ -647,13 +943,13 @@ echo "Helper: Whalekeeper updated successfully"
             
             # Send notification (only for individual updates, not batch)
             if send_notification:
-                await self.notifier.send_notification(
+                self._notify(
                     title=f"Container Updated: {container.name}",
                     message=f"Successfully updated container {container.name}",
                     update_info={
                         "Container": container.name,
-                        "Old Image": self._get_image_version(old_image),
-                        "New Image": self._get_image_version(new_image),
+                        "Old Image": old_version,
+                        "New Image": new_version,
                         "Status": "Success ✓",
                         "Health Check": "Passed"
                     },
@@ -676,8 +972,8 @@ echo "Helper: Whalekeeper updated successfully"
             self.db.add_update_history(
                 container_name=container.name,
                 container_id=container.id,
-                old_image=self._get_image_version(old_image),
-                new_image=self._get_image_version(new_image),
+                old_image=old_version,
+                new_image=new_version,
                 old_image_id=old_image.id,
                 new_image_id=new_image.id,
                 status="failed",
@@ -686,7 +982,7 @@ echo "Helper: Whalekeeper updated successfully"
             
             # Send failure notification (only for individual updates, not batch)
             if send_notification:
-                await self.notifier.send_notification(
+                self._notify(
                     title=f"Update Failed: {container.name}",
                     message=f"Failed to update container {container.name}: {str(e)}",
                     update_info={
@@ -705,74 +1001,55 @@ echo "Helper: Whalekeeper updated successfully"
         old_image = update_info['old_image']
         new_image = update_info['new_image']
         image_name = update_info['image_name']
+        # Container.labels is rebuilt from attrs on every access, so read it once
+        container_labels = container.labels or {}
+        
+        # Extract versions from image labels or tags once (prefer version number over generic tags)
+        old_version = self._get_image_version(old_image)
+        new_version = self._get_image_version(new_image)
         
         try:
             logger.info(f"Updating compose-managed container {container.name} using docker-compose")
             
             # Save current configuration for potential rollback
             container_config = self.get_container_config(container)
-            image_tag = self._get_image_version(old_image)
             
             self.db.save_image_version(
                 container_name=container.name,
                 image_name=image_name,
                 image_id=old_image.id,
-                image_tag=image_tag,
+                image_tag=old_version,
                 container_config=container_config
             )
             
             # Get compose file path from container labels
-            compose_file = container.labels.get('com.docker.compose.project.config_files')
-            compose_working_dir = container.labels.get('com.docker.compose.project.working_dir')
+            compose_file = container_labels.get('com.docker.compose.project.config_files')
+            compose_working_dir = container_labels.get('com.docker.compose.project.working_dir')
             
             # Validate and sanitize paths to prevent command injection
             compose_file_path = None
             if compose_working_dir:
-                # Validate working directory path
-                try:
-                    working_dir = Path(compose_working_dir).resolve()
-                    # Ensure it's an absolute path and doesn't contain traversal attempts
-                    if working_dir.is_absolute() and '..' not in compose_working_dir:
-                        compose_file_path = str(working_dir / 'docker-compose.yml')
-                    else:
-                        logger.warning(f"Invalid compose working directory: {compose_working_dir}")
-                except (ValueError, OSError) as e:
-                    logger.warning(f"Invalid compose working directory path: {compose_working_dir}, error: {e}")
+                working_dir = self._validate_compose_path(compose_working_dir)
+                if working_dir:
+                    compose_file_path = os.path.join(working_dir, 'docker-compose.yml')
+                else:
+                    logger.warning(f"Invalid compose working directory: {compose_working_dir}")
             elif compose_file:
-                # Validate compose file path
-                try:
-                    file_path = Path(compose_file).resolve()
-                    if file_path.is_absolute() and '..' not in compose_file and file_path.exists():
-                        compose_file_path = str(file_path)
-                    else:
-                        logger.warning(f"Invalid compose file path: {compose_file}")
-                except (ValueError, OSError) as e:
-                    logger.warning(f"Invalid compose file path: {compose_file}, error: {e}")
+                compose_file_path = self._validate_compose_path(compose_file, must_exist=True)
+                if not compose_file_path:
+                    logger.warning(f"Invalid compose file path: {compose_file}")
             
             if not compose_file_path:
                 raise Exception("No valid compose file path found in container labels")
             
-            # Build docker-compose command with validated paths
-            compose_cmd_parts = ['docker', 'compose', '-f', compose_file_path, '-p', compose_project, 'up', '-d', compose_service]
-            
-            # Execute docker-compose up command
-            import subprocess
-            result = subprocess.run(
-                compose_cmd_parts,
-                capture_output=True,
-                text=True,
-                timeout=120
-            )
-            
-            if result.returncode != 0:
-                raise Exception(f"docker-compose command failed: {result.stderr}")
+            # Execute docker-compose up command with validated paths
+            await self._compose_up(compose_file_path, compose_project, compose_service)
             
             logger.info(f"Container {container.name} updated successfully via docker-compose")
             
-            # Get the updated container
-            await asyncio.sleep(2)  # Give docker-compose time to fully start the container
+            # Get the updated container (compose up -d returns once it has started)
             try:
-                new_container = self.client.containers.get(container.name)
+                new_container = await self._get_recreated_container(container.name)
             except docker.errors.NotFound:
                 raise Exception("Container not found after docker-compose up")
             
@@ -792,8 +1069,8 @@ echo "Helper: Whalekeeper updated successfully"
                 self.db.add_update_history(
                     container_name=container.name,
                     container_id=new_container.id,
-                    old_image=self._get_image_version(old_image),
-                    new_image=self._get_image_version(new_image),
+                    old_image=old_version,
+                    new_image=new_version,
                     old_image_id=old_image.id,
                     new_image_id=new_image.id,
                     status="rolled_back",
@@ -814,19 +1091,13 @@ echo "Helper: Whalekeeper updated successfully"
                 if send_notification:
                     if rollback_success:
                         # Get compose working directory if available
-                        compose_dir = container.labels.get('com.docker.compose.project.working_dir', '/path/to/compose/dir')
+                        compose_dir = container_labels.get('com.docker.compose.project.working_dir', '/path/to/compose/dir')
                         
                         message_detail = (
                             f"The update failed health checks and was automatically rolled back.\n\n"
                             f"Your service is running with the old version as a STANDALONE container "
                             f"(no longer managed by docker-compose).\n\n"
-                            f"To restore compose management:\n"
-                            f"1. Stop and remove the standalone container:\n"
-                            f"   docker stop {container.name}\n"
-                            f"   docker rm {container.name}\n\n"
-                            f"2. Go to your compose directory and start the service:\n"
-                            f"   cd {compose_dir}\n"
-                            f"   docker compose up -d {compose_service}\n\n"
+                            f"{COMPOSE_RESTORE_INSTRUCTIONS.format(name=container.name, compose_dir=compose_dir, service=compose_service)}\n\n"
                             f"This will restore full compose management with networks and dependencies."
                         )
                     else:
@@ -835,13 +1106,13 @@ echo "Helper: Whalekeeper updated successfully"
                             f"Manual intervention required immediately!"
                         )
                     
-                    await self.notifier.send_notification(
+                    self._notify(
                         title=f"⚠️ Auto-Rollback (Compose): {container.name}",
                         message=message_detail,
                         update_info={
                             "Container": container.name,
-                            "Old Image": self._get_image_version(old_image),
-                            "New Image (Failed)": self._get_image_version(new_image),
+                            "Old Image": old_version,
+                            "New Image (Failed)": new_version,
                             "Failure Reason": failure_reason,
                             "Rollback Status": "Success - Running as standalone" if rollback_success else "FAILED - Needs manual fix",
                             "Original Project": compose_project,
@@ -859,8 +1130,8 @@ echo "Helper: Whalekeeper updated successfully"
             self.db.add_update_history(
                 container_name=container.name,
                 container_id=new_container.id,
-                old_image=self._get_image_version(old_image),
-                new_image=self._get_image_version(new_image),
+                old_image=old_version,
+                new_image=new_version,
                 old_image_id=old_image.id,
                 new_image_id=new_image.id,
                 status="success",
@@ -870,13 +1141,13 @@ echo "Helper: Whalekeeper updated successfully"
             
             # Send notification
             if send_notification:
-                await self.notifier.send_notification(
+                self._notify(
                     title=f"Container Updated: {container.name}",
                     message=f"Successfully updated compose-managed container {container.name}",
                     update_info={
                         "Container": container.name,
-                        "Old Image": self._get_image_version(old_image),
-                        "New Image": self._get_image_version(new_image),
+                        "Old Image": old_version,
+                        "New Image": new_version,
                         "Status": "Success ✓",
                         "Health Check": "Passed",
                         "Managed By": f"docker-compose (project: {compose_project})"
@@ -900,8 +1171,8 @@ echo "Helper: Whalekeeper updated successfully"
             self.db.add_update_history(
                 container_name=container.name,
                 container_id=container.id,
-                old_image=self._get_image_version(old_image),
-                new_image=self._get_image_version(new_image),
+                old_image=old_version,
+                new_image=new_version,
                 old_image_id=old_image.id,
                 new_image_id=new_image.id,
                 status="failed",
@@ -910,7 +1181,7 @@ echo "Helper: Whalekeeper updated successfully"
             
             # Send failure notification
             if send_notification:
-                await self.notifier.send_notification(
+                self._notify(
                     title=f"Update Failed: {container.name}",
                     message=f"Failed to update compose-managed container {container.name}: {str(e)}",
                     update_info={
@@ -928,8 +1199,7 @@ echo "Helper: Whalekeeper updated successfully"
         """Rollback a container to a previous version"""
         try:
             # Get the version info
-            versions = self.db.get_image_versions(container_name)
-            version = next((v for v in versions if v['id'] == version_id), None)
+            version = self.db.get_image_version(container_name, version_id)
             
             if not version:
                 logger.error(f"Version {version_id} not found for {container_name}")
@@ -944,43 +1214,40 @@ echo "Helper: Whalekeeper updated successfully"
             compose_dir = None
             
             try:
-                current_container = self.client.containers.get(container_name)
-                current_image = current_container.image
+                current_container = await self._run(self.client.containers.get, container_name)
+                current_image = await self._run(lambda: current_container.image)
+                
+                container_labels = current_container.labels
                 
                 # Check if this is a compose-managed container
-                is_compose_managed = 'com.docker.compose.project' in current_container.labels
+                is_compose_managed = 'com.docker.compose.project' in container_labels
                 if is_compose_managed:
-                    compose_project = current_container.labels.get('com.docker.compose.project')
-                    compose_service = current_container.labels.get('com.docker.compose.service')
-                    compose_dir = current_container.labels.get('com.docker.compose.project.working_dir', '/path/to/compose/dir')
+                    compose_project = container_labels.get('com.docker.compose.project')
+                    compose_service = container_labels.get('com.docker.compose.service')
+                    compose_dir = container_labels.get('com.docker.compose.project.working_dir', '/path/to/compose/dir')
                     logger.info(f"Rolling back compose-managed container {container_name} (project: {compose_project}, service: {compose_service})")
                 
                 # Get current version from labels
-                if current_image.labels:
-                    current_version_display = (
-                        current_image.labels.get('io.hass.version') or
-                        current_image.labels.get('org.opencontainers.image.version') or
-                        current_image.labels.get('version') or
-                        current_image.labels.get('VERSION')
-                    )
+                current_version_display = version_from_labels(current_image.labels)
                 
                 if not current_version_display:
                     # Fallback to tag
-                    current_version_display = current_image.tags[0] if current_image.tags else current_image.id[:12]
+                    current_tags = current_image.tags
+                    current_version_display = current_tags[0] if current_tags else current_image.id[:12]
                 
-                current_container.stop(timeout=30)
-                current_container.remove()
+                await self._run(current_container.stop, timeout=30)
+                await self._run(current_container.remove)
             except docker.errors.NotFound:
                 pass
             
             # Get the old image (the version we're rolling back TO)
             try:
-                old_image = self.client.images.get(version['image_id'])
+                old_image = await self._run(self.client.images.get, version['image_id'])
             except docker.errors.ImageNotFound:
                 # Image was pruned/deleted, try to pull it by tag
                 logger.info(f"Image {version['image_id'][:12]} not found locally, attempting to pull {version['image_name']}")
                 try:
-                    old_image = self.client.images.pull(version['image_name'])
+                    old_image = await self._run(self.client.images.pull, version['image_name'])
                 except Exception as pull_error:
                     raise Exception(f"Cannot rollback: Image {version['image_id'][:12]} not found locally and pull failed: {pull_error}")
             
@@ -990,61 +1257,30 @@ echo "Helper: Whalekeeper updated successfully"
             best_tag = version['image_name']  # Default to saved name
             rollback_to_version = None  # For display in logs
             
+            old_tags = old_image.tags
+            
             # First, try to get version from image labels
-            if old_image.labels:
-                version_label = (
-                    old_image.labels.get('io.hass.version') or  # Home Assistant
-                    old_image.labels.get('org.opencontainers.image.version') or  # OCI standard
-                    old_image.labels.get('version') or  # Generic
-                    old_image.labels.get('VERSION')
-                )
-                
-                if version_label:
-                    rollback_to_version = version_label
-                    # Construct tag with version from label
-                    image_base = best_tag.rsplit(':', 1)[0]  # Remove existing tag
-                    best_tag = f"{image_base}:{version_label}"
+            version_label = version_from_labels(old_image.labels)
+            
+            if version_label:
+                rollback_to_version = version_label
+                # Construct tag with version from label
+                image_base = best_tag.rsplit(':', 1)[0]  # Remove existing tag
+                best_tag = f"{image_base}:{version_label}"
             
             # If no version in labels, try to find versioned tags
-            if not rollback_to_version:
-                if old_image.tags:
-                    versioned_tags = [tag for tag in old_image.tags if not any(x in tag.lower() for x in [':latest', ':stable', ':dev'])]
-                if versioned_tags:
-                    best_tag = versioned_tags[0]
-                elif old_image.tags:
-                    best_tag = old_image.tags[0]
+            if not rollback_to_version and old_tags:
+                versioned_tags = [tag for tag in old_tags if tag.rsplit(':', 1)[-1].lower() not in FLOATING_TAGS]
+                best_tag = versioned_tags[0] if versioned_tags else old_tags[0]
             
             # Store the best tag for the response
             version['best_tag'] = best_tag
             
-            # Use binds directly from the saved configuration
-            binds = config.get('volumes', [])
-            
             # Recreate container with old version
-            new_container = self.client.containers.run(
-                image=old_image.id,
-                name=config['name'],
-                environment=config.get('environment'),
-                volumes=binds,  # Pass binds directly as list
-                ports=config.get('ports'),
-                network_mode=config.get('network_mode'),
-                restart_policy=config.get('restart_policy'),
-                labels=config.get('labels'),
-                command=config.get('command'),
-                entrypoint=config.get('entrypoint'),
-                working_dir=config.get('working_dir'),
-                user=config.get('user'),
-                hostname=config.get('hostname'),
-                extra_hosts=config.get('extra_hosts'),
-                privileged=config.get('privileged'),
-                cap_add=config.get('cap_add'),
-                cap_drop=config.get('cap_drop'),
-                devices=config.get('devices'),
-                detach=True
-            )
+            new_container = await self._run(self.client.containers.run, **self._run_kwargs(config, old_image.id))
             
             # Reconnect to all networks with aliases
-            self.reconnect_networks(new_container, config)
+            await self._run(self.reconnect_networks, new_container, config)
             
             logger.info(f"Successfully rolled back {container_name} to version {version_id}")
             
@@ -1084,21 +1320,15 @@ echo "Helper: Whalekeeper updated successfully"
                 # Add compose-specific info and instructions
                 if is_compose_managed:
                     notification_message += (
-                        f"\n\n⚠️ This was a compose-managed container. "
-                        f"It's now running as a STANDALONE container.\n\n"
-                        f"To restore compose management:\n"
-                        f"1. Stop and remove the standalone container:\n"
-                        f"   docker stop {container_name}\n"
-                        f"   docker rm {container_name}\n\n"
-                        f"2. Go to your compose directory and start the service:\n"
-                        f"   cd {compose_dir}\n"
-                        f"   docker compose up -d {compose_service}"
+                        "\n\n⚠️ This was a compose-managed container. "
+                        "It's now running as a STANDALONE container.\n\n"
+                        + COMPOSE_RESTORE_INSTRUCTIONS.format(name=container_name, compose_dir=compose_dir, service=compose_service)
                     )
                     notification_info["Original Project"] = compose_project
                     notification_info["Original Service"] = compose_service
                     notification_info["Compose Directory"] = compose_dir
                 
-                await self.notifier.send_notification(
+                self._notify(
                     title=f"Container Rolled Back: {container_name}",
                     message=notification_message,
                     update_info=notification_info,
@@ -1123,8 +1353,7 @@ echo "Helper: Whalekeeper updated successfully"
             # Try to get version info for better logging
             try:
                 if 'version' not in locals():
-                    versions = self.db.get_image_versions(container_name)
-                    version = next((v for v in versions if v['id'] == version_id), None)
+                    version = self.db.get_image_version(container_name, version_id)
             except Exception:
                 version = None
             
@@ -1142,39 +1371,108 @@ echo "Helper: Whalekeeper updated successfully"
             
             return {"success": False, "error": str(e)}
     
+    @property
+    def check_running(self) -> bool:
+        """Whether a batch check is in progress"""
+        return self._check_lock.locked()
+    
     async def check_all_containers(self):
-        """Check all monitored containers for updates"""
-        containers = self.get_monitored_containers()
-        
-        # Log start of batch check
-        self.db.add_check_log(
-            container_name="batch_check",
-            container_id="system",
-            current_image="",
-            current_image_id="",
-            message=f"Started checking {len(containers)} containers for updates"
-        )
-        logger.info(f"Started checking {len(containers)} containers for updates")
-        
-        # Track results for summary notification
-        results = {
-            'checked': 0,
-            'updates_found': 0,
-            'updates_success': [],
-            'updates_failed': [],
-            'no_updates': []
-        }
+        """Check all monitored containers for updates
         
-        for container in containers:
-            results['checked'] += 1
-            update_info = self.check_for_updates(container)
+        Returns without doing anything if a batch check is already running
+        (a manual check during a scheduled one, or the other way round).
+        """
+        if self._check_lock.locked():
+            logger.info("A batch check is already running, skipping this one")
+            return
+        
+        async with self._check_lock:
+            await self._check_all_containers()
+    
+    async def _check_all_containers(self):
+        containers = await self._run(self.get_monitored_containers)
+        
+        # Commit this cycle's history and version writes in one transaction
+        with self.db.begin_batch():
+            # Log start of batch check
+            self.db.add_check_log(
+                container_name="batch_check",
+                container_id="system",
+                current_image="",
+                current_image_id="",
+                message=f"Started checking {len(containers)} containers for updates"
+            )
+            logger.info(f"Started checking {len(containers)} containers for updates")
+            
+            # Track results for summary notification
+            results = {
+                'checked': 0,
+                'updates_found': 0,
+                'updates_success': [],
+                'updates_failed': [],
+                'no_updates': []
+            }
             
-            if update_info:
-                results['updates_found'] += 1
-                logger.info(f"Update available for {container.name}, starting update...")
-                success = await self.update_container(update_info, send_notification=False)
+            # Run the (blocking, network-bound) checks concurrently in worker threads.
+            # Containers sharing an image are checked one after another, so the later
+            # ones reuse the first one's cached registry digest and pull result
+            semaphore = asyncio.Semaphore(max(self.config.monitoring.max_concurrent_checks, 1))
+            
+            groups: Dict[str, List[int]] = {}
+            for index, container in enumerate(containers):
+                groups.setdefault(self._image_group_key(container), []).append(index)
+            
+            update_infos: List = [None] * len(containers)
+            
+            async def check(indexes: List[int]):
+                async with semaphore:
+                    for index in indexes:
+                        try:
+                            update_infos[index] = await self._run(self.check_for_updates, containers[index])
+                        except Exception as e:
+                            update_infos[index] = e
+            
+            self._cycle_pulls = {}
+            try:
+                await asyncio.gather(*(check(indexes) for indexes in groups.values()))
+            finally:
+                self._cycle_pulls = None
+            
+            updates = []
+            for container, update_info in zip(containers, update_infos):
+                results['checked'] += 1
+                
+                if isinstance(update_info, Exception):
+                    logger.error(f"Error checking updates for {container.name}: {update_info}")
+                    update_info = None
+                
+                if update_info:
+                    results['updates_found'] += 1
+                    updates.append(update_info)
+                else:
+                    self.update_cache.pop(container.name, None)
+                    results['no_updates'].append(container.name)
+            
+            # Restarts overlap only as far as max_concurrent_updates allows (one at a
+            # time by default, so dependent containers never restart together)
+            update_semaphore = asyncio.Semaphore(max(self.config.monitoring.max_concurrent_updates, 1))
+            
+            async def apply(update_info: Dict) -> bool:
+                async with update_semaphore:
+                    logger.info(f"Update available for {update_info['container'].name}, starting update...")
+                    return await self.update_container(update_info, send_notification=False)
+            
+            outcomes = await asyncio.gather(*(apply(update_info) for update_info in updates), return_exceptions=True)
+            
+            for update_info, success in zip(updates, outcomes):
+                container = update_info['container']
+                
+                if isinstance(success, Exception):
+                    logger.error(f"Failed to update {container.name}: {success}")
+                    success = False
                 
                 if success:
+                    self.update_cache.pop(container.name, None)
                     results['updates_success'].append({
                         'name': container.name,
                         'old_image': self._get_image_version(update_info['old_image']),
@@ -1182,22 +1480,38 @@ echo "Helper: Whalekeeper updated successfully"
                     })
                 else:
                     results['updates_failed'].append(container.name)
-            else:
-                results['no_updates'].append(container.name)
-        
-        # Log end of batch check
-        updated_list = ', '.join([item['name'] for item in results['updates_success']]) if results['updates_success'] else 'none'
-        self.db.add_check_log(
-            container_name="batch_check",
-            container_id="system",
-            current_image="",
-            current_image_id="",
-            message=f"Finished checking {len(containers)} containers for updates, updated {len(results['updates_success'])} containers ({updated_list})"
-        )
-        logger.info(f"Finished checking {len(containers)} containers for updates, updated {len(results['updates_success'])} containers ({updated_list})")
+            
+            # Only pulls that found a newer image leave the old one dangling
+            if results['updates_found']:
+                await self._prune_dangling_images()
+            
+            # Log end of batch check
+            updated_list = ', '.join(item['name'] for item in results['updates_success']) or 'none'
+            finished_message = f"Finished checking {len(containers)} containers for updates, updated {len(results['updates_success'])} containers ({updated_list})"
+            self.db.add_check_log(
+                container_name="batch_check",
+                container_id="system",
+                current_image="",
+                current_image_id="",
+                message=finished_message
+            )
+            logger.info(finished_message)
         
         # Send summary notification
         await self.send_summary_notification(results)
+        await self.flush_notifications()
+    
+    async def _prune_dangling_images(self):
+        """Prune dangling images left by pulls, at most once per PRUNE_INTERVAL"""
+        now = datetime.now()
+        if self._last_prune and (now - self._last_prune).total_seconds() < PRUNE_INTERVAL:
+            return
+        
+        self._last_prune = now
+        try:
+            await self._run(self.client.images.prune, filters={'dangling': True})
+        except Exception as e:
+            logger.debug(f"Image prune skipped: {e}")
     
     async def send_summary_notification(self, results: Dict):
         """Send a summary notification for all update checks"""
@@ -1213,28 +1527,28 @@ echo "Helper: Whalekeeper updated successfully"
         
         # Build summary message
         title = "Docker Update Summary"
-        message = f"Checked {results['checked']} containers\n\n"
+        # Lines are collected and joined once; each is followed by a blank line
+        lines = [f"Checked {results['checked']} containers"]
         
         update_info = {}
         
         if results['updates_success']:
-            message += f"✅ Successfully Updated ({len(results['updates_success'])})\n\n"
-            for item in results['updates_success']:
-                message += f"  • {item['name']}: {item['old_image']} → {item['new_image']}\n\n"
-            update_info['Successfully Updated'] = ', '.join([item['name'] for item in results['updates_success']])
+            lines.append(f"✅ Successfully Updated ({len(results['updates_success'])})")
+            lines.extend(f"  • {item['name']}: {item['old_image']} → {item['new_image']}" for item in results['updates_success'])
+            update_info['Successfully Updated'] = ', '.join(item['name'] for item in results['updates_success'])
         
         if results['updates_failed']:
-            message += f"❌ Failed Updates ({len(results['updates_failed'])})\n\n"
-            for name in results['updates_failed']:
-                message += f"  • {name}\n\n"
+            lines.append(f"❌ Failed Updates ({len(results['updates_failed'])})")
+            lines.extend(f"  • {name}" for name in results['updates_failed'])
             update_info['Failed Updates'] = ', '.join(results['updates_failed'])
         
         if results['no_updates']:
-            message += f"ℹ️ No Updates Available ({len(results['no_updates'])})\n\n"
-            for name in results['no_updates']:
-                message += f"  • {name}\n\n"
+            lines.append(f"ℹ️ No Updates Available ({len(results['no_updates'])})")
+            lines.extend(f"  • {name}" for name in results['no_updates'])
             update_info['No Updates'] = str(len(results['no_updates']))
         
+        message = "".join(f"{line}\n\n" for line in lines)
+        
         # Determine notification type
         if results['updates_failed']:
             notification_type = "error"
@@ -1255,14 +1569,14 @@ echo "Helper: Whalekeeper updated successfully"
         logger.info(f"Checking container {container_name} for updates")
         
         try:
-            container = self.client.containers.get(container_name)
+            container = await self._run(self.client.containers.get, container_name)
             
             # Check if container should be monitored
-            if container.name in self.config.monitoring.exclude_containers:
+            if container.name in self.excluded_containers:
                 logger.warning(f"Container {container_name} is in exclude list")
                 return
             
-            update_info = self.check_for_updates(container)
+            update_info = await self._run(self.check_for_updates, container)
             
             if update_info:
                 logger.info(f"Update available for {container_name}, starting update...")
@@ -1281,7 +1595,7 @@ echo "Helper: Whalekeeper updated successfully"
             container = self.client.containers.get(container_name)
             
             # Check if container should be monitored (skip this check for whalekeeper self-check)
-            if container.name != 'whalekeeper' and container.name in self.config.monitoring.exclude_containers:
+            if container.name != 'whalekeeper' and container.name in self.excluded_containers:
                 logger.warning(f"Container {container_name} is in exclude list")
                 return None
             
@@ -1299,26 +1613,34 @@ echo "Helper: Whalekeeper updated successfully"
     def get_container_image(self, container_name: str) -> str:
         """Get the current image of a container"""
         try:
-            container = self.client.containers.get(container_name)
-            image_name = container.attrs['Config']['Image']
-            return image_name
+            return self.client.api.inspect_container(container_name)['Config']['Image']
         except Exception as e:
             logger.error(f"Error getting container image: {e}")
             return "Unknown"
     
-    async def update_single_container(self, container_name: str) -> bool:
-        """Update a specific container to the latest version"""
+    async def update_single_container(self, container_name: str, update_info: Optional[Dict] = None) -> bool:
+        """Update a specific container to the latest version
+        
+        A precomputed update_info (e.g. from an earlier check) skips the registry
+        check, as long as it still describes the running container.
+        """
         try:
-            container = self.client.containers.get(container_name)
+            container = await self._run(self.client.containers.get, container_name)
             
             # Check if container should be monitored
-            if container.name in self.config.monitoring.exclude_containers:
+            if container.name in self.excluded_containers:
                 logger.warning(f"Container {container_name} is in exclude list")
                 return False
             
-            update_info = self.check_for_updates(container)
+            if update_info and update_info['container'].id != container.id:
+                # Container was recreated since the check - the update info is stale
+                update_info = None
+            
+            if update_info is None:
+                update_info = await self._run(self.check_for_updates, container)
             
             if update_info:
+                self.update_cache.pop(container_name, None)
                 return await self.update_container(update_info)
             else:
                 logger.info(f"No updates available for {container_name}")
@@ -1336,32 +1658,48 @@ echo "Helper: Whalekeeper updated successfully"
     async def start_monitoring(self):
         """Start the monitoring loop"""
         self.running = True
+        now = datetime.now()
         
-        # Start self-check loop in background
-        asyncio.create_task(self.self_check_loop())
+        # One loop drives every scheduled job: [cron iterator, next run, job, label]
+        schedules = []
+        if self.config.cron_schedule and self.config.cron_schedule.strip():
+            logger.info(f"Starting monitoring loop (cron: {self.config.cron_schedule})")
+            schedules.append([croniter(self.config.cron_schedule, now), None, self.check_all_containers, "check"])
+        else:
+            logger.info("No cron schedule configured - scheduled update checks disabled")
+        schedules.append([croniter(SELF_CHECK_SCHEDULE, now), None, self.run_self_check, "whalekeeper self-check"])
         
-        # Only start cron monitoring if schedule is configured
-        if not self.config.cron_schedule or self.config.cron_schedule.strip() == '':
-            logger.info("No cron schedule configured - monitoring loop disabled")
-            return
+        for schedule in schedules:
+            schedule[1] = schedule[0].get_next(datetime)
         
-        logger.info(f"Starting monitoring loop (cron: {self.config.cron_schedule})")
+        if self.config.monitoring.watch_image_events:
+            self._event_task = asyncio.create_task(self.watch_image_events())
         
-        # Create cron iterator
-        cron = croniter(self.config.cron_schedule, datetime.now())
+        # Check whalekeeper itself once on startup so the UI knows about pending updates
+        await asyncio.sleep(10)  # Wait 10s for app to fully start
+        await self.run_self_check()
         
         while self.running:
             try:
-                # Get next scheduled time
-                next_run = cron.get_next(datetime)
+                # Run whichever job is due first, then advance only its iterator
+                schedule = min(schedules, key=lambda entry: entry[1])
+                cron, next_run, job, label = schedule
                 wait_seconds = (next_run - datetime.now()).total_seconds()
                 
                 if wait_seconds > 0:
-                    logger.info(f"Next check scheduled at {next_run.strftime('%Y-%m-%d %H:%M:%S')} (in {wait_seconds:.0f}s)")
+                    logger.info(f"Next {label} scheduled at {next_run.strftime('%Y-%m-%d %H:%M:%S')} (in {wait_seconds:.0f}s)")
                     await asyncio.sleep(wait_seconds)
                 
-                # Run the check
-                await self.check_all_containers()
+                schedule[1] = cron.get_next(datetime)
+                try:
+                    await job()
+                finally:
+                    # Skip runs missed while the job ran (or the clock jumped) instead
+                    # of firing them back to back
+                    now = datetime.now()
+                    if schedule[1] <= now:
+                        cron.set_current(now)
+                        schedule[1] = cron.get_next(datetime)
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
                 # Sleep for a bit before retrying
@@ -1371,31 +1709,163 @@ echo "Helper: Whalekeeper updated successfully"
         """Stop the monitoring loop"""
         self.running = False
         logger.info("Stopping monitoring loop")
+        self._close_event_stream()
     
-    async def self_check_loop(self):
-        """Periodically check if whalekeeper itself has updates (without auto-updating)"""
-        logger.info("Starting whalekeeper self-check loop (daily)")
+    def _close_event_stream(self):
+        """Unblock the thread reading docker events"""
+        if self._event_stream is not None:
+            try:
+                self._event_stream.close()
+            except Exception as e:
+                logger.debug(f"Closing docker event stream failed: {e}")
+    
+    async def stop_watching_events(self):
+        """Cancel the image-events watcher and wait for it to exit"""
+        task, self._event_task = self._event_task, None
+        if task is None:
+            return
         
-        # Check immediately on startup
-        await asyncio.sleep(10)  # Wait 10s for app to fully start
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        
+        # The stream may have been opened after stop_monitoring ran
+        self._close_event_stream()
+    
+    async def watch_image_events(self):
+        """Flag containers as soon as their image tag is pulled on the host
+        
+        Only local images are compared, so this never contacts a registry; the
+        cron check still performs the actual updates.
+        """
+        logger.info("Watching Docker image events for pulled updates")
         
         while self.running:
             try:
-                # Check if whalekeeper has updates (don't send notifications, don't update)
-                update_info = self.check_container_for_update('whalekeeper', send_notifications=False)
-                
-                # Store in cache for UI to display
-                if update_info:
-                    self.update_cache['whalekeeper'] = update_info
-                    logger.info("Whalekeeper self-check: Update available")
-                elif 'whalekeeper' in self.update_cache:
-                    # Clear from cache if no longer has update
-                    del self.update_cache['whalekeeper']
-                    logger.info("Whalekeeper self-check: Up to date")
-                else:
-                    logger.info("Whalekeeper self-check complete - already up to date")
+                await self._consume_image_events()
             except Exception as e:
-                logger.error(f"Error in whalekeeper self-check: {e}")
+                logger.error(f"Error watching Docker image events: {e}")
+            
+            if self.running:
+                await asyncio.sleep(EVENT_RETRY_DELAY)
+    
+    async def _consume_image_events(self):
+        """Read image pull/tag events until the stream ends, checking affected containers"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        def pump():
+            stream = None
+            try:
+                stream = self.client.events(
+                    decode=True, filters={'type': 'image', 'event': ['pull', 'tag']}
+                )
+                self._event_stream = stream
+                if not self.running:
+                    # stop_monitoring ran before the stream was stored, so close it here
+                    stream.close()
+                for event in stream:
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+            finally:
+                if stream is not None:
+                    self._event_stream = None
+                loop.call_soon_threadsafe(queue.put_nowait, None)  # End of stream
+        
+        pump_task = asyncio.ensure_future(self._run(pump))
+        
+        stream_open = True
+        while stream_open and self.running:
+            # Wait on the pump too, so a failed stream surfaces instead of hanging here
+            get_task = asyncio.ensure_future(queue.get())
+            try:
+                done, _ = await asyncio.wait({get_task, pump_task}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                if not get_task.done():
+                    get_task.cancel()
+            if get_task not in done:
+                break
+            
+            event = get_task.result()
+            if event is None:
+                break
+            
+            # Collect the rest of the burst before looking at containers
+            await asyncio.sleep(EVENT_DEBOUNCE)
+            events = [event]
+            while not queue.empty():
+                event = queue.get_nowait()
+                if event is None:
+                    stream_open = False
+                    break
+                events.append(event)
+            
+            refs = {ref for ref in map(self._event_image_ref, events) if ref}
+            if refs:
+                await self._run(self.check_pulled_images, refs)
+        
+        await pump_task
+    
+    @staticmethod
+    def _event_image_ref(event: Dict) -> Optional[str]:
+        """Image reference a pull/tag event now points at, if any"""
+        actor = event.get('Actor', {})
+        action = event.get('Action') or event.get('status')
+        
+        if action == 'pull':
+            ref = actor.get('ID') or event.get('id')
+        elif action == 'tag':
+            ref = actor.get('Attributes', {}).get('name')
+        else:
+            ref = None
+        
+        return normalize_image_name(ref) if ref else None
+    
+    def check_pulled_images(self, refs: Set[str]) -> List[str]:
+        """Cache update info for containers whose image tag now points at a different local image"""
+        flagged = []
+        
+        for container in self.get_monitored_containers():
+            image_name = normalize_image_name(container.attrs['Config']['Image'])
+            if image_name not in refs:
+                continue
+            
+            try:
+                latest_image = self.client.images.get(image_name)
+                current_image = container.image
+            except docker.errors.ImageNotFound:
+                continue
+            
+            if latest_image.id == current_image.id:
+                continue
+            
+            logger.info(f"Update available for {container.name} ({image_name} was pulled)")
+            self.update_cache[container.name] = {
+                'container': container,
+                'old_image': current_image,
+                'new_image': latest_image,
+                'image_name': image_name
+            }
+            flagged.append(container.name)
+        
+        return flagged
+    
+    async def run_self_check(self):
+        """Check if whalekeeper itself has updates (without auto-updating)"""
+        try:
+            # Check if whalekeeper has updates (don't send notifications, don't update)
+            update_info = await self._run(self.check_container_for_update, 'whalekeeper', False)
             
-            # Wait 24 hours before next check
-            await asyncio.sleep(86400)
+            # Store in cache for UI to display
+            if update_info:
+                self.update_cache['whalekeeper'] = update_info
+                logger.info("Whalekeeper self-check: Update available")
+            elif 'whalekeeper' in self.update_cache:
+                # Clear from cache if no longer has update
+                del self.update_cache['whalekeeper']
+                logger.info("Whalekeeper self-check: Up to date")
+            else:
+                logger.info("Whalekeeper self-check complete - already up to date")
+        except Exception as e:
+            logger.error(f"Error in whalekeeper self-check: {e}")
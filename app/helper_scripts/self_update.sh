@@ -0,0 +1,12 @@
+#!/bin/sh
+# Runs inside the whalekeeper-updater helper container (docker CLI + host socket).
+# WHALEKEEPER_RUN_CMD holds the docker run command that recreates whalekeeper.
+echo "Helper: Waiting 10 seconds before updating whalekeeper..."
+sleep 10
+echo "Helper: Stopping whalekeeper container..."
+docker stop whalekeeper || true
+echo "Helper: Removing whalekeeper container..."
+docker rm whalekeeper || true
+echo "Helper: Starting new whalekeeper container..."
+eval "$WHALEKEEPER_RUN_CMD"
+echo "Helper: Whalekeeper updated successfully"
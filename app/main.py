@@ -72,6 +72,9 @@ async def lifespan(app: FastAPI):
             await monitor_task
         except asyncio.CancelledError:
             pass
+    await monitor.stop_watching_events()
+    await monitor.flush_notifications()
+    db.close()
     logger.info("Shutdown complete")
 
 
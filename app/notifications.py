@@ -1,3 +1,4 @@
+import asyncio
 import smtplib
 import aiohttp
 from email.mime.text import MIMEText
@@ -27,7 +28,8 @@ class NotificationService:
         # Send email if enabled (preferences already checked by caller)
         if self.config.notifications.email.enabled:
             try:
-                self.send_email(title, message, update_info)
+                # smtplib blocks, keep it off the event loop
+                await asyncio.to_thread(self.send_email, title, message, update_info)
             except Exception as e:
                 logger.error(f"Email notification failed: {e}")
         
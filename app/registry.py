@@ -0,0 +1,162 @@
+import logging
+import re
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DOCKER_HUB_REGISTRY = "registry-1.docker.io"
+
+# Manifest types we accept, so the registry reports the same digest docker pull records
+MANIFEST_ACCEPT = ", ".join([
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.docker.distribution.manifest.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+])
+
+_CHALLENGE_PARAM = re.compile(r'(\w+)="([^"]*)"')
+
+
+def parse_image_reference(image_name: str) -> Optional[Tuple[str, str, str]]:
+    """Split an image reference into (registry, repository, tag)
+    
+    Returns None for digest-pinned references, which cannot change upstream.
+    """
+    if '@' in image_name:
+        return None
+    
+    name, tag = image_name, 'latest'
+    last_segment = image_name.rsplit('/', 1)[-1]
+    if ':' in last_segment:
+        name, tag = image_name.rsplit(':', 1)
+    
+    parts = name.split('/', 1)
+    if len(parts) == 2 and ('.' in parts[0] or ':' in parts[0] or parts[0] == 'localhost'):
+        registry, repository = parts
+    else:
+        registry, repository = DOCKER_HUB_REGISTRY, name
+    
+    if registry in ('docker.io', 'index.docker.io'):
+        registry = DOCKER_HUB_REGISTRY
+    
+    # Official Docker Hub images live under the library/ namespace
+    if registry == DOCKER_HUB_REGISTRY and '/' not in repository:
+        repository = f"library/{repository}"
+    
+    return registry, repository, tag
+
+
+class RegistryClient:
+    """Minimal registry v2 client used to read remote manifest digests"""
+    
+    def __init__(self, username: str = "", password: str = "", timeout: float = 10, pool_size: int = 10):
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.session = requests.Session()
+        # Keep a pooled connection per concurrent check so connections are reused, not reopened
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=max(pool_size, 1)))
+        self._tokens: Dict[Tuple[str, str, str], Tuple[str, float]] = {}  # (realm, service, scope) -> (token, expiry)
+        self._challenges: Dict[Tuple[str, str], str] = {}  # (registry, repository) -> last WWW-Authenticate
+    
+    def get_remote_digest(self, image_name: str) -> Optional[str]:
+        """Get the manifest digest the registry currently serves for an image tag
+        
+        Returns None if the digest could not be determined.
+        """
+        manifest = self.head_manifest(image_name)
+        return manifest['digest'] if manifest else None
+    
+    def head_manifest(self, image_name: str, etag: Optional[str] = None) -> Optional[Dict]:
+        """HEAD an image tag's manifest
+        
+        Returns {'digest', 'etag', 'not_modified'} or None on failure. When an
+        etag is given it is sent as If-None-Match; a 304 reply sets not_modified
+        and leaves digest empty, meaning the caller's cached digest still holds.
+        """
+        reference = parse_image_reference(image_name)
+        if not reference:
+            return None
+        
+        registry, repository, tag = reference
+        url = f"https://{registry}/v2/{repository}/manifests/{tag}"
+        headers = {"Accept": MANIFEST_ACCEPT}
+        if etag:
+            headers["If-None-Match"] = etag
+        
+        try:
+            # Send a cached token up front instead of waiting to be challenged again
+            challenge = self._challenges.get((registry, repository))
+            if challenge:
+                token = self._get_token(registry, challenge)
+                if token:
+                    headers["Authorization"] = f"Bearer {token}"
+            
+            response = self.session.head(url, headers=headers, timeout=self.timeout)
+            
+            if response.status_code == 401:
+                challenge = response.headers.get('WWW-Authenticate', '')
+                self._challenges[(registry, repository)] = challenge
+                token = self._get_token(registry, challenge, refresh="Authorization" in headers)
+                if not token:
+                    return None
+                headers["Authorization"] = f"Bearer {token}"
+                response = self.session.head(url, headers=headers, timeout=self.timeout)
+            
+            if response.status_code == 304:
+                return {'digest': None, 'etag': etag, 'not_modified': True}
+            
+            if response.status_code != 200:
+                logger.debug(f"Manifest HEAD for {image_name} returned {response.status_code}")
+                return None
+            
+            digest = response.headers.get('Docker-Content-Digest')
+            if not digest:
+                return None
+            
+            return {
+                'digest': digest,
+                'etag': response.headers.get('ETag'),
+                'not_modified': False
+            }
+        except requests.RequestException as e:
+            logger.debug(f"Manifest HEAD for {image_name} failed: {e}")
+            return None
+    
+    def _get_token(self, registry: str, challenge: str, refresh: bool = False) -> Optional[str]:
+        """Fetch (or reuse, unless refresh is set) a bearer token for a WWW-Authenticate challenge"""
+        if not challenge.lower().startswith('bearer '):
+            return None
+        
+        params = dict(_CHALLENGE_PARAM.findall(challenge))
+        realm = params.get('realm')
+        if not realm:
+            return None
+        
+        cache_key = (realm, params.get('service', ''), params.get('scope', ''))
+        cached = self._tokens.get(cache_key)
+        if cached and not refresh and cached[1] > time.monotonic():
+            return cached[0]
+        
+        # Configured credentials are Docker Hub credentials; never send them elsewhere
+        auth = None
+        if registry == DOCKER_HUB_REGISTRY and self.username and self.password:
+            auth = (self.username, self.password)
+        
+        query = {key: value for key, value in params.items() if key in ('service', 'scope')}
+        response = self.session.get(realm, params=query, auth=auth, timeout=self.timeout)
+        if response.status_code != 200:
+            logger.debug(f"Registry token request to {realm} returned {response.status_code}")
+            return None
+        
+        data = response.json()
+        token = data.get('token') or data.get('access_token')
+        if token:
+            # Refresh a little early so a token never expires mid-request
+            expires_in = data.get('expires_in', 60)
+            self._tokens[cache_key] = (token, time.monotonic() + max(expires_in - 10, 0))
+        return token
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, HTTPException, Response, Cookie, Depends
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.requests import Request
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterable, Iterator, Optional
+import asyncio
+import json
 import logging
 import yaml
 from pathlib import Path
@@ -12,9 +14,9 @@ import secrets
 from itsdangerous import URLSafeTimedSerializer, BadSignature
 from passlib.context import CryptContext
 
-from app.docker_monitor import DockerMonitor
+from app.docker_monitor import DockerMonitor, version_from_labels
 from app.database import Database
-from app.config import Config
+from app.config import Config, invalidate_config_cache
 
 logger = logging.getLogger(__name__)
 
@@ -237,6 +239,7 @@ async def complete_setup(request: Request, session_data: str = Depends(require_a
         # Save updated config
         with open(config_path, 'w') as f:
             yaml.dump(config_data, f, default_flow_style=False, sort_keys=False)
+        invalidate_config_cache(str(config_path))
         
         # Mark setup as completed in database
         db.mark_setup_completed(username)
@@ -291,30 +294,27 @@ async def get_version():
 async def get_containers(session_data: str = Depends(require_auth)):
     """Get list of monitored containers"""
     try:
-        # Get all containers, not just monitored ones
-        all_containers = monitor.client.containers.list()
-        exclude_list = config.monitoring.exclude_containers
+        # Get all containers, not just monitored ones (two list requests, no per-container inspects)
+        all_containers = await monitor._run(monitor.get_container_summaries)
+        images = await monitor._run(monitor.get_image_summaries)
+        exclude_list = monitor.excluded_containers
         
         containers = []
         for c in all_containers:
+            image = images.get(c['ImageID'], {})
+            image_tags = [tag for tag in image.get('RepoTags') or [] if tag != '<none>:<none>']
+            
             # Extract version from image labels
-            version = None
-            if c.image.labels:
-                version = (
-                    c.image.labels.get('io.hass.version') or
-                    c.image.labels.get('org.opencontainers.image.version') or
-                    c.image.labels.get('version') or
-                    c.image.labels.get('VERSION')
-                )
+            version = version_from_labels(image.get('Labels'))
             
             containers.append({
-                "name": c.name,
-                "id": c.id[:12],
-                "image": c.image.tags[0] if c.image.tags else c.image.id[:12],
-                "status": c.status,
-                "monitored": c.name not in exclude_list,
+                "name": c['name'],
+                "id": c['Id'][:12],
+                "image": image_tags[0] if image_tags else c['ImageID'][:12],
+                "status": c['State'],
+                "monitored": c['name'] not in exclude_list,
                 "version": version,
-                "has_update": monitor.has_update(c.name),
+                "has_update": monitor.has_update(c['name']),
                 "monitoring_active": bool(config.cron_schedule and config.cron_schedule.strip())
             })
         
@@ -324,11 +324,20 @@ async def get_containers(session_data: str = Depends(require_auth)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _stream_json_array(rows: Iterable[Dict]) -> Iterator[str]:
+    """Encode rows as a JSON array one element at a time"""
+    yield "["
+    for index, row in enumerate(rows):
+        yield ("," if index else "") + json.dumps(row)
+    yield "]"
+
+
 @router.get("/api/history")
 async def get_history(session_data: str = Depends(require_auth)):
     """Get update history"""
     try:
-        return db.get_update_history(limit=50)
+        rows = db.iter_update_history(limit=50)
+        return StreamingResponse(_stream_json_array(rows), media_type="application/json")
     except Exception as e:
         logger.error(f"Error getting history: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -356,14 +365,14 @@ async def get_rollback_containers(session_data: str = Depends(require_auth)):
     """Get list of containers that have rollback versions available"""
     try:
         # Get all containers
-        all_containers = monitor.client.containers.list()
+        all_containers = await monitor._run(monitor.get_container_summaries)
         containers_with_versions = []
         
         for container in all_containers:
-            versions = db.get_image_versions(container.name)
+            versions = db.get_image_versions(container['name'])
             if versions and len(versions) > 0:
                 containers_with_versions.append({
-                    "name": container.name,
+                    "name": container['name'],
                     "version_count": len(versions)
                 })
         
@@ -377,9 +386,11 @@ async def get_rollback_containers(session_data: str = Depends(require_auth)):
 async def check_now(session_data: str = Depends(require_auth)):
     """Trigger immediate update check"""
     try:
+        if monitor.check_running:
+            return {"success": False, "message": "An update check is already running"}
+        
         # Get list of monitored containers to count them
-        containers = monitor.get_monitored_containers()
-        container_count = len(containers)
+        container_count = len(await monitor._run(monitor.get_monitored_container_names))
         
         # Add log entry for manual check
         db.add_check_log(
@@ -391,7 +402,6 @@ async def check_now(session_data: str = Depends(require_auth)):
         )
         
         # Run check in background
-        import asyncio
         asyncio.create_task(monitor.check_all_containers())
         return {"success": True, "message": f"Checking {container_count} container{'s' if container_count != 1 else ''} for updates..."}
     except Exception as e:
@@ -411,18 +421,24 @@ async def check_container(data: Dict, session_data: str = Depends(require_auth))
         
         if check_only:
             # Just check for updates, don't apply them (no email notifications)
-            update_info = monitor.check_container_for_update(container_name, send_notifications=False)
+            update_info = await monitor._run(
+                monitor.check_container_for_update, container_name, send_notifications=False
+            )
             
             if update_info:
+                # Remembered so a follow-up update request can skip the registry check
+                monitor.update_cache[container_name] = update_info
                 return {
                     "update_available": True,
                     "current_image": monitor._get_image_version(update_info['old_image']),
                     "new_image": monitor._get_image_version(update_info['new_image'])
                 }
             else:
+                monitor.update_cache.pop(container_name, None)
+                
                 # Check if container exists and can be checked
                 try:
-                    current_image = monitor.get_container_image(container_name)
+                    current_image = await monitor._run(monitor.get_container_image, container_name)
                     return {
                         "update_available": False,
                         "current_image": current_image
@@ -434,7 +450,6 @@ async def check_container(data: Dict, session_data: str = Depends(require_auth))
                     }
         else:
             # Run check and update in background
-            import asyncio
             asyncio.create_task(monitor.check_single_container(container_name))
             
             return {"message": f"Checking {container_name} for updates..."}
@@ -452,8 +467,8 @@ async def update_container(data: Dict, session_data: str = Depends(require_auth)
         if not container_name:
             raise HTTPException(status_code=400, detail="Missing container_name")
         
-        # Perform the update
-        success = await monitor.update_single_container(container_name)
+        # Perform the update, reusing the result of an earlier check if there is one
+        success = await monitor.update_single_container(container_name, monitor.update_cache.get(container_name))
         
         if success:
             return {
@@ -481,8 +496,7 @@ async def rollback(data: Dict, session_data: str = Depends(require_auth)):
             raise HTTPException(status_code=400, detail="Missing parameters")
         
         # Get version info before rollback
-        versions = db.get_image_versions(container_name)
-        version = next((v for v in versions if v['id'] == version_id), None)
+        version = db.get_image_version(container_name, version_id)
         
         if not version:
             return {"success": False, "message": "Version not found"}
@@ -566,6 +580,7 @@ async def save_config(data: Dict, session_data: str = Depends(require_auth)):
         # Save to config.yaml
         with open(config_path, 'w') as f:
             yaml.dump(data, f, default_flow_style=False, sort_keys=False)
+        invalidate_config_cache(str(config_path))
         
         return {
             "success": True, 
@@ -589,8 +604,8 @@ async def restart_container(session_data: str = Depends(require_auth)):
         hostname = os.uname().nodename
         
         # Find and restart the container
-        container = client.containers.get(hostname)
-        container.restart()
+        container = await asyncio.to_thread(client.containers.get, hostname)
+        await asyncio.to_thread(container.restart)
         
         return {"success": True, "message": "Container restarting..."}
     except Exception as e:
@@ -673,6 +688,7 @@ async def toggle_monitoring(container_name: str, data: Dict, session_data: str =
         # Save config
         with open(config_path, 'w') as f:
             yaml.dump(config_data, f, default_flow_style=False, sort_keys=False)
+        invalidate_config_cache(str(config_path))
         
         # Reload config in memory
         from app.config import load_config
@@ -19,6 +19,7 @@ def temp_db():
     yield db
     
     # Cleanup
+    db.close()
     try:
         os.unlink(db_path)
     except:
@@ -57,6 +58,7 @@ def mock_docker_client():
     mock_container.image.id = "img123"
     mock_container.image.tags = ["test:latest"]
     mock_container.attrs = {
+        'Name': '/test-container',
         'Config': {
             'Image': 'test:latest',
             'Env': [],
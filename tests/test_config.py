@@ -2,7 +2,7 @@ import pytest
 import tempfile
 import yaml
 from pathlib import Path
-from app.config import Config, load_config
+from app.config import Config, invalidate_config_cache, load_config
 
 
 @pytest.mark.unit
@@ -126,3 +126,76 @@ def test_registry_config():
     config = Config(**config_dict)
     assert config.registry.username == "dockeruser"
     assert config.registry.password == "dockerpass"
+
+
+@pytest.mark.unit
+def test_load_config_uses_libyaml_loader():
+    """Test config loading uses the C loader when libyaml is available"""
+    from app import config as config_module
+    
+    if yaml.__with_libyaml__:
+        assert config_module._YamlLoader is yaml.CSafeLoader
+    else:
+        assert config_module._YamlLoader is yaml.SafeLoader
+
+
+@pytest.mark.unit
+def test_load_config_cached_until_file_changes():
+    """Test that unchanged config files are served from the cache"""
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False) as f:
+        yaml.dump({"cron_schedule": "0 2 * * *"}, f)
+        config_path = f.name
+    
+    try:
+        first = load_config(config_path)
+        assert load_config(config_path) is first
+        
+        # Rewriting the file invalidates the cached entry
+        with open(config_path, 'w') as f:
+            yaml.dump({"cron_schedule": "0 */3 * * *"}, f)
+        
+        reloaded = load_config(config_path)
+        assert reloaded is not first
+        assert reloaded.cron_schedule == "0 */3 * * *"
+    finally:
+        Path(config_path).unlink(missing_ok=True)
+
+
+@pytest.mark.unit
+def test_invalidate_config_cache_after_same_size_rewrite():
+    """Test a rewrite that keeps the size and mtime is picked up once invalidated"""
+    import os
+    
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False) as f:
+        yaml.dump({"monitoring": {"exclude_containers": ["alpha"]}}, f)
+        config_path = f.name
+    
+    try:
+        assert load_config(config_path).monitoring.exclude_containers == ["alpha"]
+        
+        stat = os.stat(config_path)
+        with open(config_path, 'w') as f:
+            yaml.dump({"monitoring": {"exclude_containers": ["omega"]}}, f)
+        os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        
+        # Same signature, so the stale entry is still served until the writer drops it
+        assert load_config(config_path).monitoring.exclude_containers == ["alpha"]
+        
+        invalidate_config_cache(config_path)
+        assert load_config(config_path).monitoring.exclude_containers == ["omega"]
+    finally:
+        Path(config_path).unlink(missing_ok=True)
+
+
+@pytest.mark.unit
+def test_load_config_empty_file():
+    """Test loading an empty config file falls back to defaults"""
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False) as f:
+        config_path = f.name
+    
+    try:
+        config = load_config(config_path)
+        assert isinstance(config, Config)
+        assert config.cron_schedule == "0 22 * * 1"
+    finally:
+        Path(config_path).unlink(missing_ok=True)
@@ -60,6 +60,29 @@ def test_save_image_version(temp_db):
     assert versions[0]['container_config']['name'] == 'test-container'
 
 
+@pytest.mark.unit
+def test_get_image_version(temp_db):
+    """Test fetching a single stored version by id"""
+    config = {'image': 'test:v1', 'name': 'test-container'}
+    for tag in ("v1", "v2"):
+        temp_db.save_image_version(
+            container_name="test-container",
+            image_name=f"test:{tag}",
+            image_id=f"img-{tag}",
+            image_tag=tag,
+            container_config=config
+        )
+    
+    stored = {v['image_tag']: v for v in temp_db.get_image_versions("test-container")}
+    
+    version = temp_db.get_image_version("test-container", stored["v1"]['id'])
+    assert version == stored["v1"]
+    
+    # Ids are only looked up within the given container
+    assert temp_db.get_image_version("other-container", stored["v1"]['id']) is None
+    assert temp_db.get_image_version("test-container", 9999) is None
+
+
 @pytest.mark.unit
 def test_cleanup_old_versions(temp_db):
     """Test cleanup of old image versions"""
@@ -150,3 +173,360 @@ def test_add_check_log(temp_db):
     assert len(history) == 1
     assert history[0]['status'] == "checked"
     assert history[0]['message'] == "No updates available"
+
+
+@pytest.mark.unit
+def test_connection_reused_across_calls(temp_db):
+    """Test that all operations share one persistent connection"""
+    conn = temp_db._conn
+    
+    temp_db.create_user("testuser", "hashed_password_123")
+    temp_db.get_user("testuser")
+    temp_db.has_users()
+    
+    assert temp_db._conn is conn
+
+
+@pytest.mark.unit
+def test_connection_pragmas(temp_db):
+    """Test that WAL mode and tuned PRAGMAs are applied"""
+    journal_mode = temp_db._conn.execute("PRAGMA journal_mode").fetchone()[0]
+    synchronous = temp_db._conn.execute("PRAGMA synchronous").fetchone()[0]
+    
+    assert journal_mode == "wal"
+    assert synchronous == 1  # NORMAL
+
+
+@pytest.mark.unit
+def test_indexes_created(temp_db):
+    """Test that indexes for hot queries exist"""
+    rows = temp_db._conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index'"
+    ).fetchall()
+    index_names = {row[0] for row in rows}
+    
+    assert "idx_history_ts" in index_names
+    assert "idx_versions_container_created" in index_names
+
+
+@pytest.mark.unit
+def test_add_update_history_many(temp_db):
+    """Test batch insert of update history"""
+    temp_db.add_update_history_many([
+        {
+            'container_name': f"container-{i}",
+            'container_id': f"id{i}",
+            'old_image': "test:v1",
+            'new_image': "test:v2",
+            'old_image_id': "img1",
+            'new_image_id': "img2",
+            'status': "success",
+            'health_check_passed': True,
+        }
+        for i in range(3)
+    ])
+    
+    history = temp_db.get_update_history(limit=10)
+    assert len(history) == 3
+    assert all(row['health_check_passed'] == 1 for row in history)
+    
+    # Empty batch is a no-op
+    temp_db.add_update_history_many([])
+    assert len(temp_db.get_update_history(limit=10)) == 3
+
+
+@pytest.mark.unit
+def test_add_check_log_many(temp_db):
+    """Test batch insert of check logs"""
+    temp_db.add_check_log_many([
+        {
+            'container_name': "container-a",
+            'container_id': "a",
+            'current_image': "test:v1",
+            'current_image_id': "img1",
+        },
+        {
+            'container_name': "container-b",
+            'container_id': "b",
+            'current_image': "test:v1",
+            'current_image_id': "img1",
+            'message': "Checked",
+        },
+    ])
+    
+    history = temp_db.get_update_history(limit=10)
+    assert len(history) == 2
+    assert all(row['status'] == "checked" for row in history)
+    assert {row['message'] for row in history} == {"No updates available", "Checked"}
+
+
+@pytest.mark.unit
+def test_iter_update_history_batches(temp_db):
+    """Test streaming history across multiple fetch batches"""
+    for i in range(5):
+        temp_db.add_check_log(
+            container_name=f"container-{i}",
+            container_id=f"id{i}",
+            current_image="test:v1",
+            current_image_id="img1"
+        )
+    
+    rows = list(temp_db.iter_update_history(limit=4, batch_size=2))
+    assert len(rows) == 4
+    assert all(row['status'] == "checked" for row in rows)
+
+
+@pytest.mark.unit
+def test_iter_update_history_query_errors_raise_immediately(temp_db):
+    """Test the history query runs (and fails) before any row is iterated"""
+    import sqlite3
+    from unittest.mock import patch
+    
+    with patch('app.database.SELECT_UPDATE_HISTORY_SQL', "SELECT * FROM missing_table LIMIT ?"):
+        with pytest.raises(sqlite3.OperationalError):
+            temp_db.iter_update_history(limit=4)
+
+
+@pytest.mark.unit
+def test_cleanup_old_versions_keeps_newest(temp_db):
+    """Test cleanup removes the oldest versions and leaves other containers alone"""
+    config = {'image': 'test:v1', 'name': 'test'}
+    
+    for i in range(4):
+        temp_db.save_image_version(
+            container_name="test-container",
+            image_name=f"test:v{i}",
+            image_id=f"img{i}",
+            image_tag=f"v{i}",
+            container_config=config
+        )
+    temp_db.save_image_version(
+        container_name="other-container",
+        image_name="other:v1",
+        image_id="other1",
+        image_tag="v1",
+        container_config=config
+    )
+    
+    temp_db.cleanup_old_versions("test-container", keep_count=2)
+    
+    tags = {v['image_tag'] for v in temp_db.get_image_versions("test-container")}
+    assert tags == {"v2", "v3"}
+    assert len(temp_db.get_image_versions("other-container")) == 1
+    
+    # Nothing to trim when under the limit
+    temp_db.cleanup_old_versions("test-container", keep_count=5)
+    assert len(temp_db.get_image_versions("test-container")) == 2
+
+
+@pytest.mark.unit
+def test_schema_version_set(temp_db):
+    """Test that the schema version is recorded after init"""
+    from app.database import SCHEMA_VERSION
+    
+    version = temp_db._conn.execute("PRAGMA user_version").fetchone()[0]
+    assert version == SCHEMA_VERSION
+
+
+@pytest.mark.unit
+def test_migrate_legacy_database(tmp_path):
+    """Test that a pre-versioning database gets its missing columns added"""
+    import sqlite3
+    from app.database import Database
+    
+    db_path = tmp_path / "legacy.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE update_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                container_name TEXT NOT NULL,
+                container_id TEXT NOT NULL,
+                old_image TEXT NOT NULL,
+                new_image TEXT NOT NULL,
+                old_image_id TEXT NOT NULL,
+                new_image_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                message TEXT,
+                timestamp TEXT NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
+        conn.execute("""
+            INSERT INTO users (username, password_hash, created_at)
+            VALUES ('olduser', 'hash', '2024-01-01T00:00:00')
+        """)
+    
+    db = Database(str(db_path))
+    try:
+        db.add_update_history(
+            container_name="test-container",
+            container_id="abc123",
+            old_image="test:v1",
+            new_image="test:v2",
+            old_image_id="img1",
+            new_image_id="img2",
+            status="rolled_back",
+            health_check_passed=False,
+            rollback_reason="unhealthy"
+        )
+        assert db.get_update_history()[0]['rollback_reason'] == "unhealthy"
+        
+        # Existing users are treated as already set up
+        assert db.get_user("olduser")['setup_completed'] == 1
+    finally:
+        db.close()
+
+
+@pytest.mark.unit
+def test_container_config_roundtrip_without_orjson(temp_db, monkeypatch):
+    """Test container configs round-trip through the stdlib json fallback"""
+    from app import database
+    
+    monkeypatch.setattr(database, "orjson", None)
+    config = {'name': 'test', 'ports': {'80/tcp': [{'HostPort': '8080'}]}, 'privileged': False}
+    
+    temp_db.save_image_version(
+        container_name="test-container",
+        image_name="test:v1",
+        image_id="img1",
+        image_tag="v1",
+        container_config=config
+    )
+    
+    assert temp_db.get_image_versions("test-container")[0]['container_config'] == config
+
+
+@pytest.mark.unit
+def test_health_check_passed_stored_as_int(temp_db):
+    """Test that health check booleans are stored as 0/1 and None as NULL"""
+    for passed in (True, False, None):
+        temp_db.add_update_history(
+            container_name=f"container-{passed}",
+            container_id="abc123",
+            old_image="test:v1",
+            new_image="test:v2",
+            old_image_id="img1",
+            new_image_id="img2",
+            status="success",
+            health_check_passed=passed
+        )
+    
+    stored = {row['container_name']: row['health_check_passed'] for row in temp_db.get_update_history()}
+    assert stored == {"container-True": 1, "container-False": 0, "container-None": None}
+    assert type(stored["container-True"]) is int
+
+
+@pytest.mark.unit
+def test_warm_start_skips_schema_setup(temp_db, monkeypatch):
+    """Test reopening an up-to-date database does no schema work"""
+    from app.database import Database
+    
+    def fail_migrate(self, cursor):
+        raise AssertionError("schema setup should be skipped")
+    
+    monkeypatch.setattr(Database, "_migrate", fail_migrate)
+    
+    reopened = Database(temp_db.db_path)
+    try:
+        assert reopened.has_users() is False
+    finally:
+        reopened.close()
+
+
+@pytest.mark.unit
+def test_user_cache_invalidated_on_setup_changes(temp_db):
+    """Test cached users reflect setup wizard updates"""
+    temp_db.create_user("testuser", "hashed_password_123")
+    assert temp_db.get_user("testuser")['setup_completed'] == 0
+    
+    temp_db.mark_setup_completed("testuser")
+    assert temp_db.get_user("testuser")['setup_completed'] == 1
+    
+    temp_db.reset_setup_wizard("testuser")
+    assert temp_db.get_user("testuser")['setup_completed'] == 0
+    
+    # Callers get their own copy
+    temp_db.get_user("testuser")['setup_completed'] = 99
+    assert temp_db.get_user("testuser")['setup_completed'] == 0
+
+
+@pytest.mark.unit
+def test_cached_digest_roundtrip(temp_db):
+    """Test storing and replacing a cached registry digest"""
+    assert temp_db.get_cached_digest("nginx:latest") is None
+    
+    temp_db.upsert_cached_digest("nginx:latest", "sha256:abc", '"sha256:abc"')
+    cached = temp_db.get_cached_digest("nginx:latest")
+    assert cached['digest'] == "sha256:abc"
+    assert cached['etag'] == '"sha256:abc"'
+    assert cached['checked_at'] > 0
+    
+    temp_db.upsert_cached_digest("nginx:latest", None)
+    assert temp_db.get_cached_digest("nginx:latest")['digest'] is None
+
+
+@pytest.mark.unit
+def test_begin_batch_defers_writes(temp_db):
+    """Test that writes inside a batch are committed together when it closes"""
+    config = {'image': 'test:v1', 'name': 'test'}
+    
+    with temp_db.begin_batch():
+        temp_db.add_check_log(
+            container_name="test-container",
+            container_id="abc123",
+            current_image="test:v1",
+            current_image_id="img1"
+        )
+        for i in range(3):
+            temp_db.save_image_version(
+                container_name="test-container",
+                image_name=f"test:v{i}",
+                image_id=f"img{i}",
+                image_tag=f"v{i}",
+                container_config=config
+            )
+        temp_db.cleanup_old_versions("test-container", keep_count=2)
+        
+        # Nothing queued is visible until the batch commits; rollback records are
+        assert temp_db.get_update_history() == []
+        assert len(temp_db.get_image_versions("test-container")) == 3
+    
+    history = temp_db.get_update_history()
+    assert len(history) == 1
+    assert history[0]['timestamp']
+    
+    tags = {v['image_tag'] for v in temp_db.get_image_versions("test-container")}
+    assert tags == {"v1", "v2"}
+
+
+@pytest.mark.unit
+def test_flush_batch_commits_pending_writes(temp_db):
+    """Test that flush_batch commits queued writes without closing the batch"""
+    with temp_db.begin_batch():
+        temp_db.add_check_log(
+            container_name="test-container",
+            container_id="abc123",
+            current_image="test:v1",
+            current_image_id="img1"
+        )
+        temp_db.flush_batch()
+        assert len(temp_db.get_update_history()) == 1
+        
+        with temp_db.begin_batch():
+            temp_db.add_check_log(
+                container_name="test-container",
+                container_id="abc123",
+                current_image="test:v1",
+                current_image_id="img1"
+            )
+        # A nested batch joins the outer one
+        assert len(temp_db.get_update_history()) == 1
+    
+    assert len(temp_db.get_update_history()) == 2
@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
-from app.docker_monitor import DockerMonitor
+from app.docker_monitor import DockerMonitor, version_from_labels
 
 
 @pytest.mark.unit
@@ -19,15 +19,56 @@ def test_docker_monitor_init(test_config, temp_db, mock_notifier):
 @pytest.mark.unit
 def test_get_monitored_containers(test_config, temp_db, mock_notifier, mock_docker_client):
     """Test getting monitored containers"""
+    import docker
+    
     with patch('app.docker_monitor.docker.from_env') as mock_docker:
         mock_docker.return_value = mock_docker_client
+        mock_docker_client.api.containers.return_value = [
+            {'Id': 'abc123', 'Names': ['/test-container']},
+            {'Id': 'def456', 'Names': ['/whalekeeper']},
+            {'Id': 'fed987', 'Names': ['/just-removed']},
+        ]
+        test_container = mock_docker_client.containers.get.return_value
+        
+        def get_container(name):
+            if name != "test-container":
+                raise docker.errors.NotFound(name)
+            return test_container
+        
+        mock_docker_client.containers.get.side_effect = get_container
         
         monitor = DockerMonitor(test_config, temp_db, mock_notifier)
         containers = monitor.get_monitored_containers()
         
-        # Should exclude 'whalekeeper' from config
+        # Should exclude 'whalekeeper' from config, without inspecting it
         assert len(containers) == 1
         assert containers[0].name == "test-container"
+        inspected = [call.args[0] for call in mock_docker_client.containers.get.call_args_list]
+        assert inspected == ["test-container", "just-removed"]
+        mock_docker_client.containers.list.assert_not_called()
+
+
+@pytest.mark.unit
+def test_low_level_container_listing(test_config, temp_db, mock_notifier, mock_docker_client):
+    """Test listing containers and images through the low-level API"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_docker.return_value = mock_docker_client
+        mock_docker_client.api.containers.return_value = [
+            {'Id': 'abc123', 'Names': ['/test-container'], 'ImageID': 'sha256:img', 'State': 'running'},
+            {'Id': 'def456', 'Names': ['/whalekeeper'], 'ImageID': 'sha256:wk', 'State': 'running'},
+        ]
+        mock_docker_client.api.images.return_value = [{'Id': 'sha256:img', 'RepoTags': ['test:latest']}]
+        mock_docker_client.api.inspect_container.return_value = {'Config': {'Image': 'test:latest'}}
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        
+        assert [c['name'] for c in monitor.get_container_summaries()] == ['test-container', 'whalekeeper']
+        assert monitor.get_monitored_container_names() == ['test-container']
+        assert monitor.get_image_summaries()['sha256:img']['RepoTags'] == ['test:latest']
+        assert monitor.get_container_image('test-container') == 'test:latest'
+        
+        # No high-level list (and its per-container inspects) needed
+        mock_docker_client.containers.list.assert_not_called()
 
 
 @pytest.mark.unit
@@ -66,6 +107,18 @@ def test_get_image_version_from_tag(test_config, temp_db, mock_notifier):
         assert version == '2.0.0'
 
 
+@pytest.mark.unit
+@pytest.mark.parametrize("labels,expected", [
+    ({'io.hass.version': '2024.1', 'org.opencontainers.image.version': '1.0'}, '2024.1'),
+    ({'io.hass.version': '', 'VERSION': '3.1'}, '3.1'),
+    ({'maintainer': 'someone'}, None),
+    (None, None),
+])
+def test_version_from_labels(labels, expected):
+    """Test version labels are read in order of preference"""
+    assert version_from_labels(labels) == expected
+
+
 @pytest.mark.unit
 def test_get_image_version_fallback(test_config, temp_db, mock_notifier):
     """Test version extraction fallback to generic tags"""
@@ -99,6 +152,24 @@ def test_get_container_config(test_config, temp_db, mock_notifier, mock_docker_c
         assert config['image'] == 'test:latest'
         assert config['network_mode'] == 'bridge'
         assert config['restart_policy']['Name'] == 'unless-stopped'
+        assert monitor.get_container_config_from_attrs(container.attrs) == config
+
+
+@pytest.mark.unit
+def test_run_kwargs(test_config, temp_db, mock_notifier, mock_docker_client):
+    """Test building containers.run() arguments from a saved container config"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_docker.return_value = mock_docker_client
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        
+        kwargs = monitor._run_kwargs({'name': 'test-container', 'labels': {'a': 'b'}}, "img456")
+        
+        assert kwargs['image'] == "img456"
+        assert kwargs['name'] == 'test-container'
+        assert kwargs['labels'] == {'a': 'b'}
+        assert kwargs['volumes'] == []
+        assert kwargs['detach'] is True
 
 
 @pytest.mark.unit
@@ -135,7 +206,7 @@ def test_check_for_updates_no_update(mock_docker_from_env, test_config, temp_db,
     }
     
     # Mock pull returns same image
-    mock_client.images.pull.return_value = mock_container.image
+    mock_client.images.get.return_value = mock_container.image
     
     monitor = DockerMonitor(test_config, temp_db, mock_notifier)
     result = monitor.check_for_updates(mock_container)
@@ -164,7 +235,7 @@ def test_check_for_updates_with_update(mock_docker_from_env, test_config, temp_d
     new_image = MagicMock()
     new_image.id = "img_new_456"
     new_image.tags = ["test:v1"]
-    mock_client.images.pull.return_value = new_image
+    mock_client.images.get.return_value = new_image
     
     monitor = DockerMonitor(test_config, temp_db, mock_notifier)
     result = monitor.check_for_updates(mock_container)
@@ -174,6 +245,26 @@ def test_check_for_updates_with_update(mock_docker_from_env, test_config, temp_d
     assert result['new_image'].id == "img_new_456"
 
 
+@pytest.mark.unit
+@patch('app.docker_monitor.docker.from_env')
+def test_check_for_updates_adds_latest_after_registry_port(mock_docker_from_env, test_config, temp_db, mock_notifier):
+    """Test an untagged image on a registry with a port is checked as :latest"""
+    mock_client = MagicMock()
+    mock_docker_from_env.return_value = mock_client
+    
+    mock_container = MagicMock()
+    mock_container.name = "test-container"
+    mock_container.image.id = "img123"
+    mock_container.image.attrs = {}
+    mock_container.attrs = {'Config': {'Image': 'localhost:5000/app'}}
+    mock_client.images.get.return_value = mock_container.image
+    
+    monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+    monitor.check_for_updates(mock_container)
+    
+    mock_client.api.pull.assert_called_once_with('localhost:5000/app', tag='latest', stream=True, decode=True)
+
+
 @pytest.mark.unit
 @pytest.mark.asyncio
 async def test_rollback_container_success(test_config, temp_db, mock_notifier):
@@ -246,6 +337,50 @@ async def test_rollback_container_success(test_config, temp_db, mock_notifier):
         assert history[0]['container_name'] == 'test-container'
 
 
+@pytest.mark.unit
+@pytest.mark.asyncio
+@pytest.mark.parametrize("tags,expected", [
+    (["test:latest", "test:1.0.0"], "test:1.0.0"),
+    (["test:latest"], "test:latest"),
+    ([], "test:1.0.0"),
+])
+async def test_rollback_container_best_tag(tags, expected, test_config, temp_db, mock_notifier):
+    """Test rollback prefers versioned tags and copes with unlabeled, untagged images"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_client = MagicMock()
+        mock_docker.return_value = mock_client
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        
+        temp_db.save_image_version(
+            container_name="test-container",
+            image_name="test:1.0.0",
+            image_id="old_img_123",
+            image_tag="1.0.0",
+            container_config={'name': 'test-container', 'image': 'test:1.0.0'}
+        )
+        version_id = temp_db.get_image_versions("test-container")[0]['id']
+        
+        current_container = MagicMock()
+        current_container.labels = {}
+        current_container.image.id = "current_img_456"
+        current_container.image.tags = ["test:2.0.0"]
+        current_container.image.labels = {}
+        mock_client.containers.get.return_value = current_container
+        
+        old_image = MagicMock()
+        old_image.id = "old_img_123"
+        old_image.tags = tags
+        old_image.labels = {}
+        mock_client.images.get.return_value = old_image
+        mock_client.containers.run.return_value = MagicMock(id="new_container_789")
+        
+        result = await monitor.rollback_container("test-container", version_id)
+        
+        assert result['success'] is True
+        assert result['best_tag'] == expected
+
+
 @pytest.mark.unit
 @pytest.mark.asyncio
 async def test_rollback_container_failure(test_config, temp_db, mock_notifier):
@@ -284,3 +419,1061 @@ async def test_rollback_container_failure(test_config, temp_db, mock_notifier):
         assert history[0]['status'] == 'failed'
         assert history[0]['container_name'] == 'test-container'
         assert 'Rollback failed' in history[0]['message']
+
+
+@pytest.mark.unit
+@patch('app.docker_monitor.docker.from_env')
+def test_check_for_updates_skips_pull_when_digest_matches(mock_docker_from_env, test_config, temp_db, mock_notifier):
+    """Test that a matching registry digest short-circuits the pull"""
+    mock_client = MagicMock()
+    mock_docker_from_env.return_value = mock_client
+    
+    mock_container = MagicMock()
+    mock_container.name = "test-container"
+    mock_container.image.id = "img123"
+    mock_container.image.tags = ["test:v1"]
+    mock_container.image.attrs = {'RepoDigests': ['test@sha256:same']}
+    mock_container.attrs = {
+        'Config': {'Image': 'test:v1'}
+    }
+    
+    monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+    monitor.registry = MagicMock()
+    monitor.registry.head_manifest.return_value = {'digest': 'sha256:same', 'etag': None, 'not_modified': False}
+    
+    result = monitor.check_for_updates(mock_container)
+    
+    assert result is None
+    mock_client.api.pull.assert_not_called()
+
+
+@pytest.mark.unit
+@patch('app.docker_monitor.docker.from_env')
+def test_check_for_updates_caches_local_digests(mock_docker_from_env, test_config, temp_db, mock_notifier):
+    """Test that the current image is inspected once, then found by the container's image ID"""
+    from unittest.mock import PropertyMock
+    
+    mock_client = MagicMock()
+    mock_docker_from_env.return_value = mock_client
+    
+    mock_image = MagicMock()
+    mock_image.id = "sha256:img123"
+    mock_image.attrs = {'RepoDigests': ['test@sha256:same']}
+    mock_container = MagicMock()
+    mock_container.name = "test-container"
+    mock_container.attrs = {'Image': "sha256:img123", 'Config': {'Image': 'test:v1'}}
+    image_property = PropertyMock(return_value=mock_image)
+    type(mock_container).image = image_property
+    
+    monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+    monitor.registry = MagicMock()
+    monitor.registry.head_manifest.return_value = {'digest': 'sha256:same', 'etag': None, 'not_modified': False}
+    
+    assert monitor.check_for_updates(mock_container) is None
+    assert monitor.check_for_updates(mock_container) is None
+    
+    assert image_property.call_count == 1
+    mock_client.images.get.assert_not_called()
+    mock_client.api.pull.assert_not_called()
+
+
+@pytest.mark.unit
+@patch('app.docker_monitor.docker.from_env')
+def test_check_for_updates_pulls_when_digest_differs(mock_docker_from_env, test_config, temp_db, mock_notifier):
+    """Test that a changed registry digest falls through to the pull"""
+    mock_client = MagicMock()
+    mock_docker_from_env.return_value = mock_client
+    
+    mock_container = MagicMock()
+    mock_container.name = "test-container"
+    mock_container.image.id = "img_old_123"
+    mock_container.image.tags = ["test:v1"]
+    mock_container.image.attrs = {'RepoDigests': ['test@sha256:old']}
+    mock_container.attrs = {
+        'Config': {'Image': 'test:v1'}
+    }
+    
+    new_image = MagicMock()
+    new_image.id = "img_new_456"
+    mock_client.images.get.return_value = new_image
+    
+    monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+    monitor.registry = MagicMock()
+    monitor.registry.head_manifest.return_value = {'digest': 'sha256:new', 'etag': None, 'not_modified': False}
+    
+    result = monitor.check_for_updates(mock_container)
+    
+    assert result is not None
+    assert result['new_image'].id == "img_new_456"
+    mock_client.api.pull.assert_called_once_with("test", tag="v1", stream=True, decode=True)
+
+
+@pytest.mark.unit
+@patch('app.docker_monitor.docker.from_env')
+def test_check_for_updates_uses_local_image_with_remote_digest(mock_docker_from_env, test_config, temp_db, mock_notifier):
+    """Test an image already on the host with the registry's digest is used without pulling"""
+    mock_client = MagicMock()
+    mock_docker_from_env.return_value = mock_client
+    mock_client.api.images.return_value = [
+        {'Id': 'sha256:other', 'RepoTags': ['test:v0'], 'RepoDigests': ['test@sha256:older']},
+        {'Id': 'sha256:new', 'RepoTags': ['test:v2'], 'RepoDigests': ['test@sha256:new']},
+    ]
+    
+    mock_container = MagicMock()
+    mock_container.name = "test-container"
+    mock_container.image.id = "sha256:old"
+    mock_container.image.attrs = {'RepoDigests': ['test@sha256:old']}
+    mock_container.attrs = {'Config': {'Image': 'test:v1'}}
+    
+    new_image = MagicMock()
+    new_image.id = "sha256:new"
+    mock_client.images.get.return_value = new_image
+    
+    monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+    monitor.registry = MagicMock()
+    monitor.registry.head_manifest.return_value = {'digest': 'sha256:new', 'etag': None, 'not_modified': False}
+    
+    result = monitor.check_for_updates(mock_container)
+    
+    assert result['new_image'] is new_image
+    mock_client.api.pull.assert_not_called()
+    mock_client.api.images.assert_called_once_with(name='test')
+    # Tagged like a pull would have left it
+    mock_client.api.tag.assert_called_once_with('sha256:new', 'test', 'v1')
+    mock_client.images.get.assert_called_once_with('sha256:new')
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_check_all_containers_checks_concurrently(test_config, temp_db, mock_notifier):
+    """Test batch check runs every check and updates only containers with updates"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_docker.return_value = MagicMock()
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        
+        containers = []
+        for name in ("app-a", "app-b", "app-c"):
+            container = MagicMock()
+            container.name = name
+            containers.append(container)
+        
+        update_info = {
+            'container': containers[1],
+            'old_image': MagicMock(),
+            'new_image': MagicMock(),
+            'image_name': 'app-b:latest'
+        }
+        
+        def fake_check(container):
+            if container.name == "app-b":
+                return update_info
+            if container.name == "app-c":
+                raise RuntimeError("registry down")
+            return None
+        
+        monitor.get_monitored_containers = MagicMock(return_value=containers)
+        monitor.check_for_updates = MagicMock(side_effect=fake_check)
+        monitor.update_container = AsyncMock(return_value=True)
+        
+        await monitor.check_all_containers()
+        
+        assert monitor.check_for_updates.call_count == 3
+        monitor.update_container.assert_awaited_once_with(update_info, send_notification=False)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_check_all_containers_respects_concurrency_limit(test_config, temp_db, mock_notifier):
+    """Test batch checks never run more at once than max_concurrent_checks"""
+    import threading
+    import time
+    
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_docker.return_value = MagicMock()
+        
+        test_config.monitoring.max_concurrent_checks = 2
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        
+        containers = []
+        for i in range(6):
+            container = MagicMock()
+            container.name = f"app-{i}"
+            containers.append(container)
+        
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+        
+        def fake_check(container):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.02)
+            with lock:
+                state['running'] -= 1
+            return None
+        
+        monitor.get_monitored_containers = MagicMock(return_value=containers)
+        monitor.check_for_updates = MagicMock(side_effect=fake_check)
+        
+        await monitor.check_all_containers()
+        
+        assert monitor.check_for_updates.call_count == 6
+        assert state['peak'] <= 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_check_all_containers_skips_overlapping_run(test_config, temp_db, mock_notifier):
+    """Test a batch check started while another is running is dropped"""
+    import asyncio
+    
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_docker.return_value = MagicMock()
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        
+        release = asyncio.Event()
+        
+        async def slow_list(fn, *args, **kwargs):
+            await release.wait()
+            return []
+        
+        monitor._run = AsyncMock(side_effect=slow_list)
+        
+        first = asyncio.create_task(monitor.check_all_containers())
+        await asyncio.sleep(0)
+        assert monitor.check_running
+        
+        await monitor.check_all_containers()  # Returns immediately
+        release.set()
+        await first
+        
+        assert monitor._run.await_count == 1
+        assert not monitor.check_running
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_check_all_containers_overlaps_updates_up_to_limit(test_config, temp_db, mock_notifier):
+    """Test batch updates run at most max_concurrent_updates at once"""
+    import asyncio
+    
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_docker.return_value = MagicMock()
+        
+        test_config.monitoring.max_concurrent_updates = 2
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        
+        containers = []
+        for i in range(4):
+            container = MagicMock()
+            container.name = f"app-{i}"
+            containers.append(container)
+        
+        state = {'running': 0, 'peak': 0}
+        
+        async def fake_update(update_info, send_notification=True):
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+            await asyncio.sleep(0.01)
+            state['running'] -= 1
+            return update_info['container'].name != "app-3"
+        
+        monitor.get_monitored_containers = MagicMock(return_value=containers)
+        monitor.check_for_updates = MagicMock(side_effect=lambda c: {
+            'container': c, 'old_image': MagicMock(), 'new_image': MagicMock(), 'image_name': f"{c.name}:latest"
+        })
+        monitor.update_container = AsyncMock(side_effect=fake_update)
+        monitor.send_summary_notification = AsyncMock()
+        
+        await monitor.check_all_containers()
+        
+        assert monitor.update_container.await_count == 4
+        assert state['peak'] == 2
+        results = monitor.send_summary_notification.await_args.args[0]
+        assert [item['name'] for item in results['updates_success']] == ["app-0", "app-1", "app-2"]
+        assert results['updates_failed'] == ["app-3"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_check_all_containers_prunes_once_per_interval(test_config, temp_db, mock_notifier):
+    """Test dangling images are pruned after cycles with updates, at most once per interval"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_client = MagicMock()
+        mock_docker.return_value = mock_client
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        
+        containers = []
+        for name in ("app-a", "app-b"):
+            container = MagicMock()
+            container.name = name
+            containers.append(container)
+        
+        monitor.get_monitored_containers = MagicMock(return_value=containers)
+        monitor.check_for_updates = MagicMock(return_value=None)
+        monitor.update_container = AsyncMock(return_value=True)
+        
+        # Nothing pulled, nothing to prune
+        await monitor.check_all_containers()
+        mock_client.images.prune.assert_not_called()
+        
+        def fake_check(container):
+            if container.name == "app-a":
+                return {'container': container, 'old_image': MagicMock(), 'new_image': MagicMock(), 'image_name': 'app-a:latest'}
+            return None
+        
+        monitor.check_for_updates = MagicMock(side_effect=fake_check)
+        await monitor.check_all_containers()
+        await monitor.check_all_containers()
+        
+        mock_client.images.prune.assert_called_once_with(filters={'dangling': True})
+
+
+@pytest.mark.unit
+def test_remote_digest_cached_within_ttl(test_config, temp_db, mock_notifier):
+    """Test that a fresh cached digest is reused without asking the registry"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_docker.return_value = MagicMock()
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        monitor.registry = MagicMock()
+        monitor.registry.head_manifest.return_value = {'digest': 'sha256:abc', 'etag': '"sha256:abc"', 'not_modified': False}
+        
+        assert monitor._get_remote_digest("nginx:latest") == 'sha256:abc'
+        assert monitor._get_remote_digest("nginx:latest") == 'sha256:abc'
+        
+        monitor.registry.head_manifest.assert_called_once()
+
+
+@pytest.mark.unit
+def test_remote_digest_revalidated_with_etag(test_config, temp_db, mock_notifier):
+    """Test that an expired entry is revalidated and a 304 keeps the cached digest"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_docker.return_value = MagicMock()
+        
+        test_config.registry.digest_cache_ttl = 0
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        monitor.registry = MagicMock()
+        
+        temp_db.upsert_cached_digest("nginx:latest", 'sha256:abc', '"sha256:abc"')
+        monitor.registry.head_manifest.return_value = {'digest': None, 'etag': '"sha256:abc"', 'not_modified': True}
+        
+        assert monitor._get_remote_digest("nginx:latest") == 'sha256:abc'
+        monitor.registry.head_manifest.assert_called_once_with("nginx:latest", etag='"sha256:abc"')
+
+
+@pytest.mark.unit
+def test_remote_digest_failure_cached_briefly(test_config, temp_db, mock_notifier):
+    """Test that a failed lookup is not retried immediately"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_docker.return_value = MagicMock()
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        monitor.registry = MagicMock()
+        monitor.registry.head_manifest.return_value = None
+        
+        assert monitor._get_remote_digest("broken/image:1.0") is None
+        assert monitor._get_remote_digest("broken/image:1.0") is None
+        
+        monitor.registry.head_manifest.assert_called_once()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_run_self_check_updates_cache(test_config, temp_db, mock_notifier):
+    """Test that the self-check stores and clears whalekeeper's update info"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_docker.return_value = MagicMock()
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        update_info = {'container_name': 'whalekeeper', 'new_version': '2.0'}
+        
+        with patch.object(monitor, 'check_container_for_update', return_value=update_info) as mock_check:
+            await monitor.run_self_check()
+        mock_check.assert_called_once_with('whalekeeper', False)
+        assert monitor.update_cache['whalekeeper'] == update_info
+        
+        with patch.object(monitor, 'check_container_for_update', return_value=None):
+            await monitor.run_self_check()
+        assert 'whalekeeper' not in monitor.update_cache
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_start_monitoring_runs_self_check_without_cron(test_config, temp_db, mock_notifier):
+    """Test that the scheduler still runs the self-check when no cron schedule is set"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_docker.return_value = MagicMock()
+        
+        test_config.cron_schedule = ""
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        monitor.run_self_check = AsyncMock()
+        monitor.check_all_containers = AsyncMock()
+        
+        sleeps = []
+        
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 2:
+                monitor.running = False
+        
+        with patch('app.docker_monitor.asyncio.sleep', side_effect=fake_sleep):
+            await monitor.start_monitoring()
+        
+        # Startup check plus the first scheduled one
+        assert monitor.run_self_check.await_count == 2
+        monitor.check_all_containers.assert_not_awaited()
+
+
+@pytest.mark.unit
+@patch('app.docker_monitor.docker.from_env')
+def test_registry_login_once_and_reset_on_auth_error(mock_docker_from_env, test_config, temp_db, mock_notifier):
+    """Test that registry login happens once and is retried after an auth failure"""
+    import docker
+    
+    mock_client = MagicMock()
+    mock_docker_from_env.return_value = mock_client
+    
+    test_config.registry.username = "user"
+    test_config.registry.password = "secret"
+    
+    mock_container = MagicMock()
+    mock_container.name = "test-container"
+    mock_container.image.id = "img123"
+    mock_container.image.attrs = {}
+    mock_container.attrs = {'Config': {'Image': 'test:v1'}}
+    mock_client.images.get.return_value = mock_container.image
+    
+    monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+    monitor.check_for_updates(mock_container)
+    monitor.check_for_updates(mock_container)
+    assert mock_client.login.call_count == 1
+    
+    response = MagicMock(status_code=401)
+    mock_client.api.pull.side_effect = docker.errors.APIError("unauthorized", response=response)
+    assert monitor.check_for_updates(mock_container) is None
+    
+    mock_client.api.pull.side_effect = None
+    monitor.check_for_updates(mock_container)
+    assert mock_client.login.call_count == 2
+
+
+@pytest.mark.unit
+def test_registry_state_follows_credential_changes(test_config, temp_db, mock_notifier):
+    """Test replacing the config with new credentials rebuilds the registry client and login"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_docker.return_value = MagicMock()
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        registry = monitor.registry
+        monitor._registry_authenticated = True
+        
+        monitor.config = test_config.model_copy(deep=True)
+        assert monitor.registry is registry
+        assert monitor._registry_authenticated is True
+        
+        rotated = test_config.model_copy(deep=True)
+        rotated.registry.username = "user"
+        rotated.registry.password = "new-secret"
+        monitor.config = rotated
+        
+        assert monitor.registry is not registry
+        assert monitor.registry.username == "user"
+        assert monitor.registry.password == "new-secret"
+        assert monitor._registry_authenticated is False
+
+
+@pytest.mark.unit
+def test_excluded_containers_follow_config_changes(test_config, temp_db, mock_notifier):
+    """Test the exclude set is rebuilt when the exclude list is replaced"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_docker.return_value = MagicMock()
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        assert monitor.excluded_containers == frozenset({"whalekeeper"})
+        
+        test_config.monitoring.exclude_containers = ["whalekeeper", "db"]
+        assert monitor.excluded_containers == frozenset({"whalekeeper", "db"})
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_update_single_container_reuses_update_info(test_config, temp_db, mock_notifier):
+    """Test a precomputed update_info skips the check unless the container changed"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_client = MagicMock()
+        mock_docker.return_value = mock_client
+        
+        container = MagicMock()
+        container.name = "test-container"
+        container.id = "abc123"
+        mock_client.containers.get.return_value = container
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        monitor.check_for_updates = MagicMock(return_value=None)
+        monitor.update_container = AsyncMock(return_value=True)
+        
+        update_info = {'container': container, 'old_image': MagicMock(), 'new_image': MagicMock(), 'image_name': 'test:latest'}
+        monitor.update_cache["test-container"] = update_info
+        
+        assert await monitor.update_single_container("test-container", update_info) is True
+        monitor.check_for_updates.assert_not_called()
+        monitor.update_container.assert_awaited_once_with(update_info)
+        assert "test-container" not in monitor.update_cache
+        
+        # Stale info for a since-recreated container falls back to a fresh check
+        stale_container = MagicMock()
+        stale_container.id = "old999"
+        stale_info = dict(update_info, container=stale_container)
+        assert await monitor.update_single_container("test-container", stale_info) is False
+        monitor.check_for_updates.assert_called_once_with(container)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_notifications_sent_in_background(test_config, temp_db, mock_notifier):
+    """Test per-container notifications don't block the caller and are flushed later"""
+    import asyncio
+    
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_docker.return_value = MagicMock()
+        
+        release = asyncio.Event()
+        sent = []
+        
+        async def slow_send(**kwargs):
+            await release.wait()
+            sent.append(kwargs['title'])
+        
+        mock_notifier.send_notification = AsyncMock(side_effect=slow_send)
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        
+        monitor._notify(title="Container Updated: app", message="ok")
+        assert sent == []
+        assert len(monitor._pending_notifications) == 1
+        
+        release.set()
+        await monitor.flush_notifications()
+        
+        assert sent == ["Container Updated: app"]
+        assert not monitor._pending_notifications
+
+
+@pytest.mark.unit
+def test_reconnect_networks_filters_generated_aliases(test_config, temp_db, mock_notifier):
+    """Test the container name and short-id aliases are dropped when reconnecting"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_client = MagicMock()
+        mock_docker.return_value = mock_client
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        
+        container = MagicMock()
+        container.name = "stack-web-1"
+        monitor.reconnect_networks(container, {
+            'network_mode': 'stack_default',
+            'networks': {
+                'stack_default': {'aliases': ['web']},
+                'stack_backend': {'aliases': ['stack-web-1', 'web', '0123456789ab', 'cafe'], 'links': None},
+            }
+        })
+        
+        mock_client.networks.get.assert_not_called()
+        connect_kwargs = mock_client.api.connect_container_to_network.call_args.kwargs
+        assert connect_kwargs['net_id'] == 'stack_backend'
+        assert connect_kwargs['aliases'] == ['web', 'cafe']
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("raw_path,must_exist,expected", [
+    ("/opt/stacks/web", False, "/opt/stacks/web"),
+    ("/opt/stacks//web/", False, "/opt/stacks/web"),
+    ("/opt/stacks/../etc", False, None),
+    ("stacks/web", False, None),
+    ("/opt/stacks/web\x00", False, None),
+    ("/definitely/missing/docker-compose.yml", True, None),
+])
+def test_validate_compose_path(raw_path, must_exist, expected):
+    """Test compose paths from labels must be absolute and traversal-free"""
+    assert DockerMonitor._validate_compose_path(raw_path, must_exist=must_exist) == expected
+
+
+@pytest.mark.unit
+def test_validate_compose_path_existing_file(tmp_path):
+    """Test an existing compose file path is accepted when it must exist"""
+    compose_file = tmp_path / "docker-compose.yml"
+    compose_file.write_text("services: {}\n")
+    
+    assert DockerMonitor._validate_compose_path(str(compose_file), must_exist=True) == str(compose_file)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_compose_up_runs_without_blocking(test_config, temp_db, mock_notifier):
+    """Test docker compose up runs as an asyncio subprocess and reports its stderr on failure"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_docker.return_value = MagicMock()
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        
+        process = MagicMock()
+        process.returncode = 0
+        process.communicate = AsyncMock(return_value=(b"", b""))
+        
+        with patch('app.docker_monitor.asyncio.create_subprocess_exec', new=AsyncMock(return_value=process)) as create:
+            await monitor._compose_up("/opt/stack/docker-compose.yml", "stack", "web")
+            
+            assert create.await_args.args == (
+                'docker', 'compose', '-f', '/opt/stack/docker-compose.yml', '-p', 'stack', 'up', '-d', 'web'
+            )
+            
+            process.returncode = 1
+            process.communicate = AsyncMock(return_value=(b"", b"no such service: web"))
+            with pytest.raises(Exception, match="no such service: web"):
+                await monitor._compose_up("/opt/stack/docker-compose.yml", "stack", "web")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_get_recreated_container_retries_until_visible(test_config, temp_db, mock_notifier):
+    """Test the container is fetched right away and only retried while not found"""
+    import docker
+    
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_client = MagicMock()
+        mock_docker.return_value = mock_client
+        
+        container = MagicMock()
+        mock_client.containers.get.side_effect = [docker.errors.NotFound("gone"), container]
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        
+        sleeps = []
+        
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+        
+        with patch('app.docker_monitor.asyncio.sleep', side_effect=fake_sleep):
+            assert await monitor._get_recreated_container("stack-web-1") is container
+            
+            mock_client.containers.get.side_effect = docker.errors.NotFound("gone")
+            with pytest.raises(docker.errors.NotFound):
+                await monitor._get_recreated_container("stack-web-1", timeout=0)
+        
+        assert sleeps == [0.5]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_monitor_container_health_backs_off(test_config, temp_db, mock_notifier):
+    """Test health polling starts fast and backs off up to health_poll_max_interval"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_client = MagicMock()
+        mock_docker.return_value = mock_client
+        
+        statuses = iter(['starting'] * 4 + ['healthy'])
+        container = MagicMock()
+        container.status = 'running'
+        container.attrs = {'Config': {'Healthcheck': {'Test': ['CMD', 'true']}}, 'State': {'Health': {'Status': 'starting'}}}
+        container.reload.side_effect = lambda: container.attrs['State']['Health'].update(Status=next(statuses))
+        mock_client.containers.get.return_value = container
+        
+        test_config.monitoring.health_poll_max_interval = 8
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        
+        sleeps = []
+        
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+        
+        with patch('app.docker_monitor.asyncio.sleep', side_effect=fake_sleep):
+            assert await monitor.monitor_container_health("test-container", "old") == (True, "")
+        
+        assert sleeps == [1, 2, 4, 8, 8]
+        # The container is inspected once by get() and then once per poll
+        assert container.reload.call_count == 5
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_monitor_container_health_crash_watch(test_config, temp_db, mock_notifier):
+    """Test containers without a HEALTHCHECK are watched for two minutes, checking the final state too"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_client = MagicMock()
+        mock_docker.return_value = mock_client
+        
+        container = MagicMock()
+        container.status = 'running'
+        container.attrs = {'Config': {}, 'State': {}, 'RestartCount': 0}
+        mock_client.containers.get.return_value = container
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        
+        sleeps = []
+        
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 12:
+                container.status = 'exited'
+        
+        with patch('app.docker_monitor.asyncio.sleep', side_effect=fake_sleep):
+            healthy, reason = await monitor.monitor_container_health("test-container", "old")
+        
+        assert healthy is False
+        assert reason.startswith("Container stopped (status: exited")
+        assert sum(sleeps) == 120
+        assert container.reload.call_count == 12
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_self_update_spawns_helper(test_config, temp_db, mock_notifier, mock_docker_client):
+    """Test the self-update helper gets the run command via its environment"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_client = MagicMock()
+        mock_docker.return_value = mock_client
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        
+        new_image = MagicMock()
+        new_image.id = "sha256:new"
+        new_image.tags = ["ghcr.io/desoepman/whalekeeper:latest"]
+        new_image.labels = {}
+        old_image = MagicMock()
+        old_image.id = "sha256:old"
+        old_image.tags = ["ghcr.io/desoepman/whalekeeper:latest"]
+        old_image.labels = {}
+        
+        assert await monitor.self_update({
+            'container': mock_docker_client.containers.get.return_value,
+            'old_image': old_image,
+            'new_image': new_image
+        }) is True
+        
+        kwargs = mock_client.containers.run.call_args.kwargs
+        assert kwargs['image'] == "docker:cli"
+        assert 'eval "$WHALEKEEPER_RUN_CMD"' in kwargs['command'][2]
+        assert "apk add" not in kwargs['command'][2]
+        assert kwargs['environment']['WHALEKEEPER_RUN_CMD'].startswith("docker run -d --name test-container")
+        assert kwargs['environment']['WHALEKEEPER_RUN_CMD'].endswith("ghcr.io/desoepman/whalekeeper:latest")
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_update_container_saves_version_before_stop(test_config, temp_db, mock_notifier, mock_docker_client):
+    """Test the rollback record is committed before the old container is stopped"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_client = MagicMock()
+        mock_client.containers.run.return_value.id = "def456"
+        mock_docker.return_value = mock_client
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        monitor.monitor_container_health = AsyncMock(return_value=(True, None))
+        
+        container = mock_docker_client.containers.get.return_value
+        versions_at_stop = []
+        container.stop.side_effect = lambda **kw: versions_at_stop.extend(
+            temp_db.get_image_versions(container.name)
+        )
+        
+        old_image = MagicMock()
+        old_image.id = "sha256:old"
+        old_image.tags = ["test:v1"]
+        old_image.labels = {}
+        new_image = MagicMock()
+        new_image.id = "sha256:new"
+        new_image.tags = ["test:v2"]
+        new_image.labels = {}
+        
+        with temp_db.begin_batch():
+            await monitor.update_container({
+                'container': container,
+                'old_image': old_image,
+                'new_image': new_image,
+                'image_name': "test:latest"
+            }, send_notification=False)
+        
+        assert [v['image_id'] for v in versions_at_stop] == ["sha256:old"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_send_summary_notification_message(test_config, temp_db, mock_notifier):
+    """Test the batch summary lists each group with blank-line separated entries"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_docker.return_value = MagicMock()
+        
+        mock_notifier.send_notification = AsyncMock()
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        
+        await monitor.send_summary_notification({
+            'checked': 3,
+            'updates_found': 2,
+            'updates_success': [{'name': 'app-a', 'old_image': '1.0', 'new_image': '1.1'}],
+            'updates_failed': ['app-b'],
+            'no_updates': ['app-c']
+        })
+        
+        kwargs = mock_notifier.send_notification.await_args.kwargs
+        assert kwargs['message'] == (
+            "Checked 3 containers\n\n"
+            "✅ Successfully Updated (1)\n\n"
+            "  • app-a: 1.0 → 1.1\n\n"
+            "❌ Failed Updates (1)\n\n"
+            "  • app-b\n\n"
+            "ℹ️ No Updates Available (1)\n\n"
+            "  • app-c\n\n"
+        )
+        assert kwargs['notification_type'] == "error"
+
+
+@pytest.mark.unit
+def test_event_image_ref():
+    """Test extracting the affected image reference from docker image events"""
+    pull_event = {'Type': 'image', 'Action': 'pull', 'Actor': {'ID': 'nginx', 'Attributes': {'name': 'nginx'}}}
+    tag_event = {'Type': 'image', 'Action': 'tag', 'Actor': {'ID': 'sha256:abc', 'Attributes': {'name': 'localhost:5000/app:1.2'}}}
+    delete_event = {'Type': 'image', 'Action': 'delete', 'Actor': {'ID': 'sha256:abc', 'Attributes': {}}}
+    
+    assert DockerMonitor._event_image_ref(pull_event) == 'nginx:latest'
+    assert DockerMonitor._event_image_ref(tag_event) == 'localhost:5000/app:1.2'
+    assert DockerMonitor._event_image_ref(delete_event) is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_image_events_flag_containers_with_pulled_updates(test_config, temp_db, mock_notifier):
+    """Test a pull event caches update info only for containers whose tag moved"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker, \
+         patch('app.docker_monitor.EVENT_DEBOUNCE', 0):
+        mock_client = MagicMock()
+        mock_docker.return_value = mock_client
+        
+        outdated = MagicMock()
+        outdated.name = "web"
+        outdated.attrs = {'Config': {'Image': 'nginx'}}
+        outdated.image.id = "sha256:old"
+        
+        current = MagicMock()
+        current.name = "cache"
+        current.attrs = {'Config': {'Image': 'redis:7'}}
+        current.image.id = "sha256:redis"
+        
+        images = {'nginx:latest': MagicMock(id="sha256:new"), 'redis:7': MagicMock(id="sha256:redis")}
+        mock_client.images.get.side_effect = images.__getitem__
+        mock_client.events.return_value = [
+            {'Type': 'image', 'Action': 'pull', 'Actor': {'ID': 'nginx:latest', 'Attributes': {}}},
+            {'Type': 'image', 'Action': 'pull', 'Actor': {'ID': 'redis:7', 'Attributes': {}}},
+        ]
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        monitor.running = True
+        monitor.get_monitored_containers = MagicMock(return_value=[outdated, current])
+        
+        await monitor._consume_image_events()
+        
+        assert set(monitor.update_cache) == {"web"}
+        assert monitor.update_cache["web"]['new_image'].id == "sha256:new"
+        assert monitor.update_cache["web"]['image_name'] == "nginx:latest"
+        mock_client.api.pull.assert_not_called()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_stop_watching_events_cancels_watcher(test_config, temp_db, mock_notifier):
+    """Test shutdown cancels the image-events task and closes the blocking stream"""
+    import asyncio
+    import threading
+    
+    class BlockingStream:
+        def __init__(self):
+            self.closed = threading.Event()
+        
+        def __iter__(self):
+            self.closed.wait(5)
+            return iter(())
+        
+        def close(self):
+            self.closed.set()
+    
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_client = MagicMock()
+        mock_docker.return_value = mock_client
+        stream = BlockingStream()
+        mock_client.events.return_value = stream
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        monitor.running = True
+        monitor._event_task = asyncio.create_task(monitor.watch_image_events())
+        
+        while monitor._event_stream is None:
+            await asyncio.sleep(0.01)
+        
+        task = monitor._event_task
+        await monitor.stop_watching_events()
+        
+        assert task.done()
+        assert monitor._event_task is None
+        assert stream.closed.is_set()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_image_events_open_failure_surfaces(test_config, temp_db, mock_notifier):
+    """Test a stream that fails to open raises instead of leaving the consumer waiting"""
+    import asyncio
+    
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_client = MagicMock()
+        mock_docker.return_value = mock_client
+        mock_client.events.side_effect = ConnectionError("daemon unreachable")
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        monitor.running = True
+        
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(monitor._consume_image_events(), timeout=2)
+        assert monitor._event_stream is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_image_events_stream_closed_if_stopped_while_opening(test_config, temp_db, mock_notifier):
+    """Test a stream opened as monitoring stops is closed by the pump itself"""
+    import asyncio
+    
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_client = MagicMock()
+        mock_docker.return_value = mock_client
+        stream = MagicMock()
+        stream.__iter__.return_value = iter(())
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        monitor.running = True
+        
+        def open_stream(**kwargs):
+            # stop_monitoring lands before the pump has stored the stream
+            monitor.stop_monitoring()
+            return stream
+        
+        mock_client.events.side_effect = open_stream
+        
+        await asyncio.wait_for(monitor._consume_image_events(), timeout=2)
+        
+        stream.close.assert_called_once()
+        assert monitor._event_stream is None
+
+
+@pytest.mark.unit
+@patch('app.docker_monitor.docker.from_env')
+def test_check_for_updates_pull_reports_known_digest(mock_docker_from_env, test_config, temp_db, mock_notifier):
+    """Test that a pull reporting the local image's digest skips inspecting the result"""
+    mock_client = MagicMock()
+    mock_docker_from_env.return_value = mock_client
+    mock_client.api.pull.return_value = [
+        {'status': 'Pulling from library/test', 'id': 'v1'},
+        {'status': 'Digest: sha256:same'},
+        {'status': 'Status: Image is up to date for test:v1'},
+    ]
+    
+    mock_container = MagicMock()
+    mock_container.name = "test-container"
+    mock_container.image.id = "img123"
+    mock_container.image.attrs = {'RepoDigests': ['test@sha256:same']}
+    mock_container.attrs = {'Config': {'Image': 'test:v1'}}
+    
+    monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+    monitor.registry = MagicMock()
+    monitor.registry.head_manifest.return_value = None  # Registry lookup failed, fall back to pull
+    
+    assert monitor.check_for_updates(mock_container) is None
+    mock_client.images.get.assert_not_called()
+
+
+@pytest.mark.unit
+@patch('app.docker_monitor.docker.from_env')
+def test_check_for_updates_pull_error_line(mock_docker_from_env, test_config, temp_db, mock_notifier):
+    """Test that an error reported inside the pull stream fails the check"""
+    mock_client = MagicMock()
+    mock_docker_from_env.return_value = mock_client
+    mock_client.api.pull.return_value = [{'error': 'manifest unknown'}]
+    
+    mock_container = MagicMock()
+    mock_container.name = "test-container"
+    mock_container.image.attrs = {}
+    mock_container.attrs = {'Config': {'Image': 'test:v1'}}
+    
+    monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+    
+    assert monitor.check_for_updates(mock_container) is None
+    mock_client.images.get.assert_not_called()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_check_all_containers_pulls_shared_image_once(test_config, temp_db, mock_notifier):
+    """Test containers running the same image share one pull per batch check"""
+    with patch('app.docker_monitor.docker.from_env') as mock_docker:
+        mock_client = MagicMock()
+        mock_docker.return_value = mock_client
+        mock_client.api.pull.side_effect = lambda *args, **kwargs: iter([{'status': 'Digest: sha256:same'}])
+        
+        containers = []
+        for name, image in (("web-1", "nginx"), ("web-2", "nginx:latest"), ("db", "postgres:16")):
+            container = MagicMock()
+            container.name = name
+            container.id = f"{name}-id"
+            container.image.attrs = {'RepoDigests': [f"{image.split(':')[0]}@sha256:same"]}
+            container.attrs = {'Config': {'Image': image}}
+            containers.append(container)
+        
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        monitor.registry = MagicMock()
+        monitor.registry.head_manifest.return_value = None  # Force the pull path
+        monitor.get_monitored_containers = MagicMock(return_value=containers)
+        
+        await monitor.check_all_containers()
+        
+        pulled = sorted(call.args[0] for call in mock_client.api.pull.call_args_list)
+        assert pulled == ['nginx', 'postgres']
+        assert monitor._cycle_pulls is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_start_monitoring_skips_runs_missed_during_long_job(test_config, temp_db, mock_notifier):
+    """Test a job outlasting its next slot is not re-run immediately to catch up"""
+    from datetime import datetime, timedelta
+    
+    clock = {'now': datetime(2026, 1, 1, 0, 30, 0)}
+    
+    class FakeDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return clock['now']
+    
+    with patch('app.docker_monitor.docker.from_env') as mock_docker, \
+         patch('app.docker_monitor.datetime', FakeDatetime):
+        mock_docker.return_value = MagicMock()
+        
+        test_config.cron_schedule = "0 * * * *"
+        monitor = DockerMonitor(test_config, temp_db, mock_notifier)
+        monitor.run_self_check = AsyncMock()
+        
+        async def long_check():
+            clock['now'] += timedelta(hours=3)
+            if monitor.check_all_containers.await_count == 2:
+                monitor.running = False
+        
+        monitor.check_all_containers = AsyncMock(side_effect=long_check)
+        
+        sleeps = []
+        
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+            clock['now'] += timedelta(seconds=seconds)
+        
+        with patch('app.docker_monitor.asyncio.sleep', side_effect=fake_sleep):
+            await monitor.start_monitoring()
+        
+        # Startup delay, wait for 01:00, then straight to 05:00 after the 3h job
+        assert sleeps == [10, 1790, 3600]
@@ -0,0 +1,102 @@
+import pytest
+from unittest.mock import MagicMock
+
+from app.registry import RegistryClient, parse_image_reference, DOCKER_HUB_REGISTRY
+
+
+@pytest.mark.unit
+def test_parse_official_image():
+    """Test official Docker Hub images resolve to the library namespace"""
+    assert parse_image_reference("nginx:1.25") == (DOCKER_HUB_REGISTRY, "library/nginx", "1.25")
+    assert parse_image_reference("nginx") == (DOCKER_HUB_REGISTRY, "library/nginx", "latest")
+
+
+@pytest.mark.unit
+def test_parse_custom_registry():
+    """Test references with an explicit registry host"""
+    assert parse_image_reference("ghcr.io/owner/app:v2") == ("ghcr.io", "owner/app", "v2")
+    assert parse_image_reference("localhost:5000/app") == ("localhost:5000", "app", "latest")
+    assert parse_image_reference("user/app:dev") == (DOCKER_HUB_REGISTRY, "user/app", "dev")
+
+
+@pytest.mark.unit
+def test_parse_digest_reference():
+    """Test digest-pinned references are not checked remotely"""
+    assert parse_image_reference("nginx@sha256:abc123") is None
+
+
+def _response(status_code, headers=None, json_data=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = json_data or {}
+    return response
+
+
+@pytest.mark.unit
+def test_get_remote_digest_with_token_challenge():
+    """Test digest lookup negotiates a bearer token and caches it"""
+    client = RegistryClient()
+    client.session = MagicMock()
+    challenge = 'Bearer realm="https://auth.docker.io/token",service="registry.docker.io",scope="repository:library/nginx:pull"'
+    client.session.head.side_effect = [
+        _response(401, {'WWW-Authenticate': challenge}),
+        _response(200, {'Docker-Content-Digest': 'sha256:remote'}),
+        _response(200, {'Docker-Content-Digest': 'sha256:remote'}),
+    ]
+    client.session.get.return_value = _response(200, json_data={'token': 'abc', 'expires_in': 300})
+    
+    assert client.get_remote_digest("nginx:latest") == 'sha256:remote'
+    assert client.get_remote_digest("nginx:latest") == 'sha256:remote'
+    
+    # Token fetched once and sent up front on the second lookup, without a new challenge
+    client.session.get.assert_called_once()
+    assert client.session.head.call_count == 3
+    assert client.session.head.call_args.kwargs['headers']['Authorization'] == "Bearer abc"
+
+
+@pytest.mark.unit
+def test_rejected_cached_token_is_refreshed():
+    """Test a cached token the registry rejects is replaced rather than reused"""
+    client = RegistryClient()
+    client.session = MagicMock()
+    challenge = 'Bearer realm="https://auth.docker.io/token",service="registry.docker.io",scope="repository:library/nginx:pull"'
+    client.session.head.side_effect = [
+        _response(401, {'WWW-Authenticate': challenge}),
+        _response(200, {'Docker-Content-Digest': 'sha256:remote'}),
+        _response(401, {'WWW-Authenticate': challenge}),
+        _response(200, {'Docker-Content-Digest': 'sha256:remote'}),
+    ]
+    client.session.get.side_effect = [
+        _response(200, json_data={'token': 'old', 'expires_in': 300}),
+        _response(200, json_data={'token': 'new', 'expires_in': 300}),
+    ]
+    
+    assert client.get_remote_digest("nginx:latest") == 'sha256:remote'
+    assert client.get_remote_digest("nginx:latest") == 'sha256:remote'
+    
+    assert client.session.get.call_count == 2
+    assert client.session.head.call_args.kwargs['headers']['Authorization'] == "Bearer new"
+
+
+@pytest.mark.unit
+def test_get_remote_digest_failure_returns_none():
+    """Test registry errors fall back to None"""
+    client = RegistryClient()
+    client.session = MagicMock()
+    client.session.head.return_value = _response(404)
+    
+    assert client.get_remote_digest("nginx:latest") is None
+
+
+@pytest.mark.unit
+def test_head_manifest_not_modified():
+    """Test a 304 reply to If-None-Match is reported as not modified"""
+    client = RegistryClient()
+    client.session = MagicMock()
+    client.session.head.return_value = _response(304)
+    
+    manifest = client.head_manifest("ghcr.io/owner/app:latest", etag='"sha256:abc"')
+    
+    assert manifest['not_modified'] is True
+    assert client.session.head.call_args.kwargs['headers']['If-None-Match'] == '"sha256:abc"'